@@ -0,0 +1,98 @@
+"""Memory benchmark of the chat history storage
+
+Measures the memory per message (with `tracemalloc`) of a chat history stored as
+- a list of plain message objects with a `datetime` per message (the previous `ChatMessage`),
+- a list of the slotted `ChatMessage` (default `Chat`),
+- a `ColumnarHistory` (`Chat(columnar=True)`).
+
+The overhead is the memory per message beyond the UTF-8 encoded text (lists keep every text as a `str` object,
+the columnar history copies the texts into one buffer).
+
+Usage:
+  python benchmarks/chat_memory.py [--messages 100000] [--length 80]
+"""
+
+import gc
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime
+
+from auto_llama import Chat
+
+
+class PlainChatMessage:
+    """Chat message as stored before (plain object with a `datetime`)"""
+
+    def __init__(self, role: str, message: str, date: datetime = None):
+        self.role = role
+        self.message = message
+        self.date = date or datetime.now()
+
+
+def make_texts(messages: int, length: int) -> list[str]:
+    return [f"{i:08d} " + "x" * max(length - 9, 0) for i in range(messages)]
+
+
+def measure(build) -> int:
+    """Memory in bytes allocated by `build` which is still in use afterwards"""
+
+    gc.collect()
+    tracemalloc.start()
+
+    res = build()
+
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del res
+    return size
+
+
+def plain_history(texts: list[str]) -> list[PlainChatMessage]:
+    # Role names are copied like roles parsed from a request (not interned)
+    return [PlainChatMessage("".join(["us", "er"]), text) for text in texts]
+
+
+def slotted_history(texts: list[str]) -> Chat:
+    chat = Chat()
+    for text in texts:
+        chat.append("".join(["us", "er"]), text)
+
+    return chat
+
+
+def columnar_history(texts: list[str]) -> Chat:
+    chat = Chat(columnar=True)
+    for text in texts:
+        chat.append("".join(["us", "er"]), text)
+
+    return chat
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Chat history memory benchmark")
+
+    parser.add_argument("--messages", type=int, default=100_000, help="Number of messages")
+    parser.add_argument("--length", type=int, default=80, help="Number of characters per message")
+
+    args = parser.parse_args()
+
+    texts = make_texts(args.messages, args.length)
+    content = sum(len(text.encode()) for text in texts)
+    strings = sum(sys.getsizeof(text) for text in texts)
+
+    print(f"{args.messages} messages with {args.length} characters")
+    print(f"{'storage':>22} | {'bytes/message':>13} | {'overhead/message':>16}")
+
+    for name, build, owns_texts in (
+        ("list (plain objects)", plain_history, False),
+        ("list (slotted)", slotted_history, False),
+        ("ColumnarHistory", columnar_history, True),
+    ):
+        size = measure(lambda: build(texts))
+
+        # The lists reference the existing texts, the columnar history copies them into its buffer
+        total = size + (0 if owns_texts else strings)
+        print(f"{name:>22} | {total / args.messages:>13.1f} | {(total - content) / args.messages:>16.1f}")
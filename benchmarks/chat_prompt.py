@@ -0,0 +1,63 @@
+"""Microbenchmark of the incrementally rendered `Chat.prompt` over long chats
+
+Appends messages one at a time and renders the prompt after every message, like a long chat session does once
+per turn. The incremental prompt is compared with rendering the whole transcript on every turn (a join over the
+history) and checked to be identical.
+
+Usage:
+  python benchmarks/chat_prompt.py [--messages 10000] [--columnar]
+"""
+
+import time
+from argparse import ArgumentParser
+
+from auto_llama import Chat
+
+
+def full_render(chat: Chat) -> str:
+    """Render the whole transcript (what `Chat.prompt` did before it was cached)"""
+
+    return "\n".join(chat_msg.to_string(chat.name(chat_msg.role)) for chat_msg in chat.history)
+
+
+def run(messages: int, columnar: bool, render) -> tuple[float, list[float], str]:
+    """Total time, time per message of every tenth of the chat and the final prompt"""
+
+    chat = Chat("You are a helpful assistant.", columnar=columnar)
+    interval = max(messages // 10, 1)
+    checkpoints = []
+    prompt = ""
+
+    start = time.perf_counter()
+    last = start
+
+    for i in range(messages):
+        chat.append("user" if i % 2 == 0 else "assistant", f"Message number {i} of a long conversation.")
+        prompt = render(chat)
+
+        if (i + 1) % interval == 0:
+            now = time.perf_counter()
+            checkpoints.append((now - last) / interval)
+            last = now
+
+    return time.perf_counter() - start, checkpoints, prompt
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Chat prompt rendering benchmark")
+
+    parser.add_argument("--messages", type=int, default=10_000, help="Number of messages in the chat")
+    parser.add_argument("--columnar", action="store_true", help="Use the columnar history")
+
+    args = parser.parse_args()
+
+    incremental_total, incremental, expected = run(args.messages, args.columnar, lambda chat: chat.prompt)
+    full_total, full, prompt = run(args.messages, args.columnar, full_render)
+
+    print(f"{'messages':>8} | {'incremental (us/turn)':>21} | {'full render (us/turn)':>21}")
+
+    for i, (inc, ful) in enumerate(zip(incremental, full)):
+        print(f"{(i + 1) * max(args.messages // 10, 1):>8} | {inc * 1e6:>21.1f} | {ful * 1e6:>21.1f}")
+
+    print(f"Total: {incremental_total:.2f} s incremental, {full_total:.2f} s full render")
+    print(f"Identical prompt: {prompt == expected}")
@@ -0,0 +1,86 @@
+"""Benchmark `ChunkMerger.merge` on overlapping fragments of one document
+
+Fragments are random slices of a generated document, like the search results of a memory which are merged into
+one text per source. The merger is compared with the previous implementation (checking every chunk against every
+other chunk with `in`) and checked to give the same result. Both grow quadratically with the number of fragments,
+the merger only moves the searches into C.
+
+Usage:
+  python benchmarks/chunk_merger.py [--fragments 1000] [--repeat 3]
+"""
+
+import random
+import time
+from argparse import ArgumentParser
+
+from auto_llama.text import ChunkMerger
+
+
+def quadratic_merge(chunks: list[str], seperator: str = " ") -> str:
+    """Previous `ChunkMerger.merge` (one substring search per pair of chunks)"""
+
+    result = ""
+    valid_idx = set(range(len(chunks)))
+
+    for i, chunk in enumerate(chunks):
+        valid = True
+
+        for other in (other for j, other in enumerate(chunks) if j != i and j in valid_idx):
+            if chunk in other:
+                valid = False
+                valid_idx.remove(i)
+                break
+
+        if valid:
+            result += chunk + seperator
+
+    return result.strip(seperator)
+
+
+def make_fragments(fragments: int, seed: int = 0) -> list[str]:
+    """Random slices (100 to 600 characters) of a document of 60k words"""
+
+    rng = random.Random(seed)
+    words = ["".join(rng.choices("abcdefghij", k=rng.randint(2, 8))) for _ in range(2000)]
+    document = " ".join(rng.choices(words, k=60_000))
+    res = []
+
+    for _ in range(fragments):
+        start = rng.randint(0, len(document) - 600)
+        res.append(document[start : start + rng.randint(100, 600)])
+
+    return res
+
+
+def best_of(repeat: int, func, *args) -> tuple[float, str]:
+    """Fastest of `repeat` runs in seconds and the result"""
+
+    times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func(*args)
+        times.append(time.perf_counter() - start)
+
+    return min(times), res
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="ChunkMerger benchmark")
+
+    parser.add_argument("--fragments", type=int, default=1000, help="Number of fragments")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (the fastest is reported)")
+
+    args = parser.parse_args()
+
+    fragments = make_fragments(args.fragments)
+
+    quadratic_time, expected = best_of(args.repeat, quadratic_merge, fragments)
+    merger_time, res = best_of(args.repeat, lambda: ChunkMerger(fragments).merge())
+    stitch_time, _ = best_of(args.repeat, lambda: ChunkMerger(fragments).merge(stitch=True))
+
+    print(f"{args.fragments} fragments")
+    print(f"Pairwise search: {quadratic_time * 1000:8.1f} ms")
+    print(f"ChunkMerger:     {merger_time * 1000:8.1f} ms ({quadratic_time / merger_time:.0f}x)")
+    print(f"  with stitching {stitch_time * 1000:8.1f} ms")
+    print(f"Identical output: {res == expected}")
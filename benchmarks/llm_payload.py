@@ -0,0 +1,85 @@
+"""Regression benchmark for per-call generation parameters of `LocalOpenAILLM`
+
+Sends many completions with per-call stopping strings to a local stub of the OpenAI completions API and reports
+the request payload size and latency per window of calls. Both have to stay flat: per-call stopping strings must
+not accumulate in the shared configuration of the LLM.
+
+Usage:
+  python benchmarks/llm_payload.py [--calls 10000] [--window 1000]
+"""
+
+import json
+import statistics
+import threading
+import time
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from auto_llama.llm import LocalOpenAILLM
+
+RESPONSE = json.dumps(
+    {
+        "id": "cmpl-0",
+        "object": "text_completion",
+        "created": 0,
+        "model": "NONE",
+        "choices": [{"text": "ok", "index": 0, "logprobs": None, "finish_reason": "stop"}],
+    }
+).encode()
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """Answers every request with the same completion and records the size of the request bodies"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    payload_sizes: list[int] = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.payload_sizes.append(len(body))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(calls: int, window: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    llm = LocalOpenAILLM(base_url=f"http://127.0.0.1:{server.server_port}/v1", stopping_strings=["\nuser:"])
+    latencies = []
+
+    for i in range(calls):
+        start = time.perf_counter()
+        llm.completion("Hello", stopping_strings=[f"\nuser{i % 4}:"])
+        latencies.append(time.perf_counter() - start)
+
+    server.shutdown()
+
+    print(f"{'calls':>13} | {'payload (bytes)':>15} | {'median latency (ms)':>19}")
+
+    for start in range(0, calls, window):
+        sizes = _CompletionHandler.payload_sizes[start : start + window]
+        latency = statistics.median(latencies[start : start + window]) * 1000
+
+        print(f"{start:>6}-{start + len(sizes):<6} | {max(sizes):>15} | {latency:>19.3f}")
+
+    print(f"Default stopping strings after {calls} calls: {list(llm.generation_config.stop)}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="LocalOpenAILLM payload regression benchmark")
+
+    parser.add_argument("--calls", type=int, default=10_000, help="Number of completions")
+    parser.add_argument("--window", type=int, default=1_000, help="Number of calls per reported window")
+
+    args = parser.parse_args()
+
+    run(args.calls, args.window)
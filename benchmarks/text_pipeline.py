@@ -0,0 +1,103 @@
+"""Benchmark the single-pass `TextPipeline` against chaining the `auto_llama.text` helpers
+
+Both normalize the same large document with the preprocessing steps of `TxtAIMemory` and the outputs are checked
+to be identical. The steps which need NLTK models (`remove_specific_pos`, `lemmatize`) are only included with
+`--nlp` (requires the NLTK data, see `bin/nltk_ressources.py`).
+
+Usage:
+  python benchmarks/text_pipeline.py [--words 200000] [--repeat 3] [--nlp]
+"""
+
+import random
+import time
+from argparse import ArgumentParser
+
+from auto_llama import text as nlp
+
+WORDS = ["the", "Model", "runs", "42", "tokens,", "3.5", "faster!", "with", "caching", "and", "1st", "pass", "(again)"]
+SEPARATORS = [" ", " ", " ", "  ", "\n", "\n\n", "\t", "\r\n", "\u00a0", "\u200b"]
+
+
+def make_document(words: int, seed: int = 0) -> str:
+    """Random text with numbers, punctuation and irregular whitespace"""
+
+    rng = random.Random(seed)
+    parts = []
+
+    for _ in range(words):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(SEPARATORS))
+
+    return "".join(parts)
+
+
+def chain(text: str, with_nlp: bool) -> str:
+    """Preprocessing of `TxtAIMemory` with one helper call (and one tokenization) per step"""
+
+    text = nlp.merge_spaces(text)
+    text = nlp.merge_symbols(text, symbol="\n")
+    text = nlp.merge_symbols(text, symbol="\r")
+    text = nlp.delete_symbols(text, symbol="\t")
+    text = nlp.delete_symbols(text, symbol="\u200b")
+    text = nlp.delete_symbols(text, symbol="\u00a0")
+    text = nlp.delete_symbols(text, symbol="\u00ad")
+
+    if with_nlp:
+        text = nlp.remove_specific_pos(text)
+        text = nlp.lemmatize(text)
+
+    return nlp.num_to_word(text)
+
+
+def pipeline(with_nlp: bool) -> nlp.TextPipeline:
+    """The same steps compiled into one `TextPipeline`"""
+
+    steps = (
+        nlp.TextPipeline()
+        .merge_spaces()
+        .merge_symbols("\n")
+        .merge_symbols("\r")
+        .delete_symbols("\t")
+        .delete_symbols("\u200b")
+        .delete_symbols("\u00a0")
+        .delete_symbols("\u00ad")
+    )
+
+    if with_nlp:
+        steps = steps.remove_specific_pos().lemmatize()
+
+    return steps.num_to_word()
+
+
+def best_of(repeat: int, func, *args) -> tuple[float, str]:
+    """Fastest of `repeat` runs in seconds and the result"""
+
+    times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func(*args)
+        times.append(time.perf_counter() - start)
+
+    return min(times), res
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="TextPipeline benchmark")
+
+    parser.add_argument("--words", type=int, default=200_000, help="Number of words in the document")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (the fastest is reported)")
+    parser.add_argument("--nlp", action="store_true", help="Include the steps which need NLTK models")
+
+    args = parser.parse_args()
+
+    document = make_document(args.words)
+    compiled = pipeline(args.nlp)
+
+    chain_time, expected = best_of(args.repeat, chain, document, args.nlp)
+    pipeline_time, res = best_of(args.repeat, compiled, document)
+
+    print(f"Document: {args.words} words, {len(document) / 1e6:.1f} MB")
+    print(f"Helper chain: {chain_time * 1000:8.1f} ms")
+    print(f"TextPipeline: {pipeline_time * 1000:8.1f} ms ({chain_time / pipeline_time:.1f}x)")
+    print(f"Identical output: {res == expected}")
@@ -16,7 +16,7 @@ Config(
 from argparse import ArgumentParser
 from datetime import datetime
 
-from auto_llama import Chat, ChatMessage, logger, Config
+from auto_llama import Chat, ChatMessage, logger, Config, ModelLoader
 from auto_llama_agents import AgentResponse
 
 
@@ -90,12 +90,14 @@ if __name__ == "__main__":
         "-c", "--config", type=str, help="Path to config file (Python file with `config=Config(...)`)", required=True
     )
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose mode")
+    parser.add_argument("--prewarm", type=str, nargs="*", default=[], help="Models to load in the background at start")
 
     args = parser.parse_args()
 
     logger.configure("VERBOSE" if args.verbose else "NONE")
 
     config = Config.load(args.config)
+    ModelLoader.prewarm(args.prewarm)
     chat = Chat(config.system_prompt, config.roles)
 
     try:
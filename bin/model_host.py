@@ -0,0 +1,32 @@
+"""Serve the models of auto_llama to other processes (e.g. API workers or `rag.py` loaders)
+
+Start the host with the same config as the workers (the config registers the models) and connect the workers with
+`ModelLoader.connect(address)` (`--model-host` for `rag.py`, `MODEL_HOST` for the API).
+"""
+
+from argparse import ArgumentParser
+
+from auto_llama import Config, ModelLoader, logger
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="AutoLLaMa Model Host")
+
+    parser.add_argument(
+        "-c", "--config", type=str, help="Path to config file (Python file with `config=Config(...)`)", required=True
+    )
+    parser.add_argument("-a", "--address", type=str, default="/tmp/auto_llama.sock", help="Path of the Unix socket")
+    parser.add_argument("--authkey", type=str, help="Key clients have to authenticate with")
+    parser.add_argument("--prewarm", type=str, nargs="*", default=[], help="Models to load before serving")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose mode")
+
+    args = parser.parse_args()
+
+    logger.configure("VERBOSE" if args.verbose else "INFO")
+
+    Config.load(args.config)
+    ModelLoader.prewarm(args.prewarm, background=False)
+
+    try:
+        ModelLoader.serve(args.address, args.authkey.encode() if args.authkey else None)
+    except KeyboardInterrupt:
+        print("\nExiting ...")
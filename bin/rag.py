@@ -9,21 +9,19 @@ Config(
 from __future__ import annotations
 
 import os
+import threading
 import traceback
 from pathlib import Path
 from argparse import ArgumentParser
 
-
-# import threading
 from queue import Empty
 from multiprocessing import JoinableQueue, Process
 
-from auto_llama import logger, Config
+from auto_llama import logger, Config, ModelLoader
 from auto_llama.data import Article
 from auto_llama.text import WebTextLoader, PDFLoader, PlainTextLoader, TextLoader
 from auto_llama_memory import Memory
 
-
 web_loader = WebTextLoader()
 text_loader = PlainTextLoader(file_types=["md"])
 pdf_loader = PDFLoader()
@@ -39,16 +37,19 @@ def load_articles_job(src_queue: JoinableQueue[tuple[str, TextLoader]], article_
     Assumes that all sources are already in the `src_queue`
     """
 
-    while not src_queue.empty():
+    while True:
+        # Sources put right before starting the process may not have arrived yet
         try:
-            source, loader = src_queue.get_nowait()
+            source, loader = src_queue.get(timeout=1.0)
         except Empty:
             break
 
         logger.print(f"Loading '{source}' with {loader.__class__.__name__}")
 
         try:
-            article_queue.put(loader(source))
+            # Loaders can yield large sources in parts (e.g. PDFs page by page)
+            for article in loader.stream(source):
+                article_queue.put(article)
         except Exception as e:
             if logger.log_level == "VERBOSE":
                 traceback.print_exc()
@@ -57,16 +58,38 @@ def load_articles_job(src_queue: JoinableQueue[tuple[str, TextLoader]], article_
         src_queue.task_done()
 
 
-def save_article_job(memory: Memory, article_queue: JoinableQueue[Article]):
-    """Save all articles in `article_queue`
+def save_article_job(memory: Memory, article_queue: JoinableQueue[Article], timeout: float = 1.0):
+    """Save all articles which are currently in `article_queue` (waits up to `timeout` seconds for the first one)
 
     Can not be started in a separate process (Problem with GPU and multiprocessing).
-    Assumes that all articles are already in the `article_queue`
+    Called repeatedly while the articles are loaded, so saving starts before all sources are loaded.
     """
 
+    try:
+        articles: list[Article] = [article_queue.get(timeout=timeout)]
+        article_queue.task_done()
+    except Empty:
+        return
+
     while not article_queue.empty():
-        article = article_queue.get_nowait()
+        articles.append(article_queue.get_nowait())
+        article_queue.task_done()
 
+    if not articles:
+        return
+
+    # Save all articles in one batch, which lets the memory process them together (e.g. chunking with spaCy).
+    # A failed batch saves nothing (see `Memory.save`), so retrying the articles one by one doesn't duplicate them.
+    logger.print(f"Saving {len(articles)} articles")
+    try:
+        memory.save(articles)
+        return
+    except Exception as e:
+        if logger.log_level == "VERBOSE":
+            traceback.print_exc()
+        logger.print(f"Unable to save all articles at once - {str(e)}", verbose_alt="Saving articles one by one")
+
+    for article in articles:
         logger.print(f"Saving '{article.title}'")
         try:
             memory.save(article)
@@ -77,8 +100,6 @@ def save_article_job(memory: Memory, article_queue: JoinableQueue[Article]):
                 f"Unable do save '{article.title}' - {str(e)}", verbose_alt=f"Unable to load '{article.title}'"
             )
 
-        article_queue.task_done()
-
 
 def select_file_loader(source: str):
     """Select the right loader for a given file path"""
@@ -113,15 +134,27 @@ def expand_folder(source: Path, recursive: bool) -> list[tuple[str, TextLoader]]
     return file_paths
 
 
-def make_load_jobs(sources: list[str], recursive: bool, queue: JoinableQueue[tuple[str, TextLoader]]):
-    """Put all supported sources with the right loader into the `queue`"""
+def load_web_articles(urls: list[str], article_queue: JoinableQueue[Article]):
+    """Fetch all web pages concurrently and put them into `article_queue`"""
+
+    for url, article in zip(urls, web_loader.batch(urls, return_exceptions=True)):
+        if isinstance(article, Exception):
+            logger.print(f"Unable do load '{url}' - {str(article)}", verbose_alt=f"Unable to load '{url}'")
+            continue
+
+        logger.print(f"Loaded '{url}' with {web_loader.__class__.__name__}")
+        article_queue.put(article)
+
+
+def make_load_jobs(sources: list[str], recursive: bool, queue: JoinableQueue[tuple[str, TextLoader]], urls: list[str]):
+    """Put all supported local sources with the right loader into the `queue` and all web pages into `urls`"""
 
     for source in sources:
         source.rstrip("/")
 
-        # Add WebPage load job
+        # Web pages are fetched together (see `load_web_articles`)
         if web_loader.is_valid(source):
-            queue.put_nowait((source, web_loader))
+            urls.append(source)
 
         # Add load jobs for local data
         elif os.path.exists(source):
@@ -142,17 +175,27 @@ def make_load_jobs(sources: list[str], recursive: bool, queue: JoinableQueue[tup
 def add_data(sources: list[str], recursive: bool, nthreads: int, config: Config):
     """Add data to memory"""
 
-    make_load_jobs(sources, recursive, src_queue)
+    urls: list[str] = []
+    make_load_jobs(sources, recursive, src_queue, urls)
 
-    for _ in range(nthreads):
-        Process(target=load_articles_job, args=(src_queue, article_queue), daemon=True).start()
+    loaders = [Process(target=load_articles_job, args=(src_queue, article_queue), daemon=True) for _ in range(nthreads)]
 
-    # Process(target=save_article_job, args=(config.memory, article_queue), daemon=True).start()
+    # Web pages are fetched while the processes load the local files
+    loaders.append(threading.Thread(target=load_web_articles, args=(urls, article_queue), daemon=True))
 
-    src_queue.join()
-    logger.print("All articles loaded!", seperator="=")
+    for loader in loaders:
+        loader.start()
+
+    # Articles are saved while the remaining sources are loaded (e.g. the first pages of a large PDF)
+    loading = True
+
+    while loading or not article_queue.empty():
+        if loading and not any(loader.is_alive() for loader in loaders):
+            loading = False
+            logger.print("All articles loaded!", seperator="=")
+
+        save_article_job(config.memory, article_queue)
 
-    save_article_job(config.memory, article_queue)
     logger.print("All articles saved!", seperator="=")
 
 
@@ -189,11 +232,17 @@ if __name__ == "__main__":
         default=1,
         help="Increase number of threads for loading new source data",
     )
+    parser.add_argument("--model-host", type=str, help="Use the models of a model host (see model_host.py)")
+    parser.add_argument("--model-host-key", type=str, help="Key for authenticating with the model host")
 
     args = parser.parse_args()
 
     logger.configure("VERBOSE" if args.verbose else "INFO")
 
+    if args.model_host:
+        authkey = args.model_host_key.encode() if args.model_host_key else None
+        ModelLoader.connect(args.model_host, authkey)
+
     config = Config.load(args.config)
 
     if args.add:
@@ -1,12 +1,12 @@
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 from auto_llama_agents import Agent, AgentSelector
 from auto_llama_memory import Memory
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from auto_llama import Config, LLMInterface
-from auto_llama.text import TextLoader
+from auto_llama import Config, LLMInterface, ModelLoader
+from auto_llama.text import TextLoader, doc_cache
 
 
 class AutoLLaMaConfig(Config):
@@ -23,6 +23,23 @@ class AutoLLaMaConfig(Config):
 class Settings(BaseSettings):
     AUTO_LLAMA_CONFIG_PATH: str
     DATA_PATH: str
+    DOC_CACHE_PATH: str | None = None
+    """Directory for caching processed spaCy documents on disk, so identical texts aren't parsed again"""
+    DOC_CACHE_SIZE: int = 32
+    """Number of processed spaCy documents cached in memory (0 disables the memory cache). Summaries of `/context`
+    are cached, so saving them to a memory doesn't parse them again"""
+    METRICS: bool = True
+    MODEL_HOST: str | None = None
+    """Unix socket of a model host (see `bin/model_host.py`). Models are used from the host instead of loaded"""
+    MODEL_HOST_KEY: str | None = None
+    """Key for authenticating with the model host"""
+    PIPELINE: bool = False
+    """Run agent selection and memory retrieval concurrently and start generating before the agents are done"""
+    PREWARM_MODELS: list[str] = []
+    """Names of models (see `ModelLoader`) which are loaded in the background at startup"""
+    PROMPT_LAYOUT: Literal["system", "prefix_cache"] = "system"
+    """Where the per-turn context is placed: in the system message or next to the latest user message (keeps the
+    system message and earlier turns byte-stable, so the KV prefix cache of the LLM backend can be reused)"""
 
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent / ".env",
@@ -42,4 +59,11 @@ class Settings(BaseSettings):
 
 
 settings = Settings.model_validate({})
+
+if settings.MODEL_HOST:
+    ModelLoader.connect(settings.MODEL_HOST, settings.MODEL_HOST_KEY.encode() if settings.MODEL_HOST_KEY else None)
+
+if settings.DOC_CACHE_SIZE or settings.DOC_CACHE_PATH:
+    doc_cache.configure(settings.DOC_CACHE_SIZE, settings.DOC_CACHE_PATH)
+
 auto_llama_config = AutoLLaMaConfig.load(settings.AUTO_LLAMA_CONFIG_PATH)
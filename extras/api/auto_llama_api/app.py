@@ -1,19 +1,32 @@
 import os
 from argparse import ArgumentParser
+from contextlib import asynccontextmanager
 from importlib.metadata import version
 from pathlib import Path
 
 import uvicorn
+from auto_llama_api import settings
 from auto_llama_api.models import Version
-from auto_llama_api.routes import agentRouter, contextRouter, memoryRouter, openaiRouter
+from auto_llama_api.routes import agentRouter, contextRouter, memoryRouter, metricsRouter, openaiRouter
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
+from auto_llama import ModelLoader
+
 BASE_PATH = Path(__file__).parent.absolute()
 TITLE = "AutoLLama API"
 
-app = FastAPI(title=TITLE, version=version("auto-llama-api"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load models in the background at startup"""
+
+    app.state.prewarm = ModelLoader.prewarm(settings.PREWARM_MODELS)
+    yield
+
+
+app = FastAPI(title=TITLE, version=version("auto-llama-api"), lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -26,6 +39,7 @@ app.include_router(openaiRouter)
 app.include_router(memoryRouter)
 app.include_router(agentRouter)
 app.include_router(contextRouter)
+app.include_router(metricsRouter)
 
 
 @app.get("/", response_model=Version, tags=["AutoLLaMa", "Welcome"])
@@ -35,6 +49,18 @@ async def root():
     return Version(message="Welcome to the AutoLLaMa API!", version=app.version)
 
 
+@app.get("/ready", tags=["AutoLLaMa"])
+async def ready():
+    """Readiness probe. Not ready (503) until the models are prewarmed"""
+
+    prewarm = app.state.prewarm
+
+    if not prewarm.done:
+        raise HTTPException(status_code=503, detail=f"Prewarming models ({prewarm.progress:.0%})")
+
+    return {"ready": True, "loaded": prewarm.loaded, "failed": {name: repr(e) for name, e in prewarm.failed.items()}}
+
+
 def main():
     """Start FastAPI Server"""
 
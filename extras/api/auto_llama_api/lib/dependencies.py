@@ -1,18 +1,20 @@
 from typing import Annotated, Callable
 
 from auto_llama_agents import Agent as AutoLLamaAgent
-from auto_llama_api import auto_llama_config
+from auto_llama_api import auto_llama_config, settings
 from auto_llama_memory import Memory
 from fastapi import Depends, UploadFile
 
 from auto_llama import LLMInterface as AutoLLaMaLLM
+from auto_llama.llm import InstrumentedLLM
 from auto_llama.text import FileLike, FileLoader
 
 _active_memory = auto_llama_config.default_memory
+_llm = InstrumentedLLM(auto_llama_config.llm) if settings.METRICS else auto_llama_config.llm
 
 
 def get_llm():
-    return auto_llama_config.llm
+    return _llm
 
 
 LLMInterface = Annotated[AutoLLaMaLLM, Depends(get_llm)]
@@ -2,3 +2,4 @@ from .openai import openaiRouter
 from .memory import memoryRouter
 from .agents import agentRouter
 from .context import contextRouter
+from .metrics import metricsRouter
@@ -0,0 +1,18 @@
+from typing import Literal
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from auto_llama import metrics
+
+metricsRouter = APIRouter(prefix="/metrics", tags=["AutoLLaMa"])
+
+
+@metricsRouter.get("")
+async def get_metrics(format: Literal["prometheus", "json"] = "prometheus"):
+    """LLM latency and throughput metrics (Prometheus text format or JSON)"""
+
+    if format == "json":
+        return metrics.snapshot()
+
+    return PlainTextResponse(metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
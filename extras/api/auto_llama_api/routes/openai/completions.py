@@ -1,11 +1,14 @@
 """OpenAI API completion routes"""
 
 import asyncio
+from contextlib import suppress
 from datetime import UTC, datetime
+from typing import AsyncGenerator
 from uuid import uuid4
 
-from auto_llama_api import auto_llama_config
-from auto_llama_api.lib import LLMInterface, resolve_agents
+from auto_llama_agents import AgentInfo, AgentResponse
+from auto_llama_api import auto_llama_config, settings
+from auto_llama_api.lib import ActiveMemory, LLMInterface, resolve_agents
 from auto_llama_api.models import (
     OpenAIChatChoice,
     OpenAIChatCompletion,
@@ -17,11 +20,13 @@ from auto_llama_api.models import (
     OpenAICompletionResponseBase,
     OpenAIMessage,
 )
+from auto_llama_memory import Memory
 from fastapi import APIRouter
 from fastapi.requests import Request
 from sse_starlette import EventSourceResponse
 
 from auto_llama import Chat
+from auto_llama import LLMInterface as AutoLLaMaLLM
 
 completionRouter = APIRouter()
 
@@ -29,7 +34,7 @@ streaming_semaphore = asyncio.Semaphore(1)
 
 
 @completionRouter.post("/completions", response_model=OpenAICompletionResponse)
-def openai_completion(req: Request, args: OpenAICompletion, llm: LLMInterface):
+async def openai_completion(req: Request, args: OpenAICompletion, llm: LLMInterface):
     res_id = f"cmpl-{uuid4().hex}"
     stop = args.stop if isinstance(args.stop, list) else [args.stop]
     cmpl_response = OpenAICompletionResponse(
@@ -43,44 +48,74 @@ def openai_completion(req: Request, args: OpenAICompletion, llm: LLMInterface):
     )
 
     if not args.stream:
-        response = llm.completion(args.prompt, stopping_strings=stop, max_new_tokens=args.max_tokens)
+        response = await llm.acompletion(args.prompt, stopping_strings=stop, max_new_tokens=args.max_tokens)
         cmpl_response.choices.append(OpenAICompletionChoice(finish_reason="length", index=0, text=response))
         return cmpl_response
 
-    stream = llm.completion_stream(args.prompt, stopping_strings=stop, max_new_tokens=args.max_tokens)
+    stream = llm.acompletion_stream(args.prompt, stopping_strings=stop, max_new_tokens=args.max_tokens)
 
     async def create_stream_response(stream):
         async with streaming_semaphore:
-            for el in stream:
-                if await req.is_disconnected():
-                    break
+            try:
+                async for el in stream:
+                    if await req.is_disconnected():
+                        break
 
-                cmpl_response.choices = [OpenAICompletionChoice(index=0, text=el)]
-                yield {"data": cmpl_response.model_dump_json()}
+                    cmpl_response.choices = [OpenAICompletionChoice(index=0, text=el)]
+                    yield {"data": cmpl_response.model_dump_json()}
+            finally:
+                await stream.aclose()
 
     return EventSourceResponse(create_stream_response(stream))
 
 
-@completionRouter.post("/chat/completions", response_model=OpenAIChatCompletionResponse)
-def openai_chat_completion(req: Request, args: OpenAIChatCompletion, llm: LLMInterface):
-    res_id = f"chatcmpl-{uuid4().hex}"
-    stop = args.stop if isinstance(args.stop, list) else [args.stop]
-    cmpl_response = OpenAIChatCompletionResponse(
-        id=res_id, object="chat.completion", created=round(datetime.now(UTC).timestamp()), choices=[]
-    )
+class _Speculation:
+    """Generation running ahead of the consumer
 
-    chat = Chat.from_history(history=[msg.to_chat() for msg in args.messages])
-    available_agents = resolve_agents(args.tools, auto_llama_config.agents)
+    Chunks are buffered until they are consumed, so the generation can be started before it is known whether its
+    result will be used. Closing (`aclose`) cancels the generation.
+    """
 
-    if available_agents != {}:
-        results = auto_llama_config.selector.run(chat, available_agents)
-    else:
-        results = {}
+    _done = object()
+
+    def __init__(self, stream: AsyncGenerator[str, None]) -> None:
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(stream))
+
+    async def _run(self, stream: AsyncGenerator[str, None]):
+        try:
+            async for chunk in stream:
+                self._queue.put_nowait(chunk)
+        except Exception as e:
+            self._queue.put_nowait(e)
+        finally:
+            await stream.aclose()
+            self._queue.put_nowait(self._done)
+
+    async def __aiter__(self) -> AsyncGenerator[str, None]:
+        while (chunk := await self._queue.get()) is not self._done:
+            if isinstance(chunk, Exception):
+                raise chunk
+
+            yield chunk
+
+    async def aclose(self):
+        self._task.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await self._task
+
+
+def _create_chat(args: OpenAIChatCompletion) -> Chat:
+    return Chat.from_history(history=[msg.to_chat() for msg in args.messages])
+
+
+def _apply_agent_results(chat: Chat, results: AgentResponse) -> tuple[str, str]:
+    """Add agent results to the chat. Returns the context and the response of the agents"""
 
     context = ""
     response = ""
 
-    # Interpret agent results
     for out in results.items():
         if out.position is out.POSITION.CONTEXT:
             context += "\n" + out.to_string()
@@ -91,13 +126,133 @@ def openai_chat_completion(req: Request, args: OpenAIChatCompletion, llm: LLMInt
         elif out.position is out.POSITION.SYSTEM:
             chat.append("system", out.to_string())
 
-    # Generate response from agent results instead of llm response
+    return context, response
+
+
+async def _remember(memory: Memory | None, query: str) -> str:
+    if memory is None:
+        return ""
+
+    remembered = await asyncio.to_thread(memory.remember, query)
+    return "\n" + "\n".join([fact.get_formatted() for fact in remembered])
+
+
+def _format_context(chat: Chat, context: str):
+    if settings.PROMPT_LAYOUT == "prefix_cache":
+        chat.format_system_message()
+        chat.attach_context(context.strip())
+    else:
+        chat.format_system_message(context=context)
+
+
+async def _prepare_chat(
+    args: OpenAIChatCompletion, memory: Memory | None, available_agents: dict[str, AgentInfo]
+) -> tuple[str, Chat]:
+    """Run agents and memory retrieval one after another. Returns the agent response and the prepared chat"""
+
+    chat = _create_chat(args)
+
+    if available_agents != {}:
+        results = await asyncio.to_thread(auto_llama_config.selector.run, chat, available_agents)
+    else:
+        results = AgentResponse.empty()
+
+    context, response = _apply_agent_results(chat, results)
+
     if response:
-        msg = chat.append("assistant", response)
+        return response, chat
+
+    context += await _remember(memory, chat.last_from("user"))
+    _format_context(chat, context)
+
+    return response, chat
+
 
+async def _pipelined_chat(
+    args: OpenAIChatCompletion,
+    llm: AutoLLaMaLLM,
+    memory: Memory | None,
+    available_agents: dict[str, AgentInfo],
+    stop: list[str],
+) -> tuple[str, _Speculation | None]:
+    """Run agents and memory retrieval concurrently and start generating before the agents are done
+
+    The generation assumes that no agent is needed (the most common case). It is cancelled if the agents return a
+    response and restarted if their output has to be added to the chat or context.
+
+    Returns the agent response and the stream of the generation
+    """
+
+    chat = _create_chat(args)
+    remembering = asyncio.create_task(_remember(memory, chat.last_from("user")))
+    selecting = None
+
+    if available_agents != {}:
+        # The selector gets its own chat, because the generation modifies the chat concurrently
+        selecting = asyncio.create_task(
+            asyncio.to_thread(auto_llama_config.selector.run, _create_chat(args), available_agents)
+        )
+
+    try:
+        memory_context = await remembering
+    except BaseException:
+        if selecting is not None:
+            selecting.cancel()
+        raise
+
+    speculation = None
+
+    if selecting is None or not selecting.done():
+        _format_context(chat, memory_context)
+        speculation = _Speculation(llm.achat_stream(chat, stopping_strings=stop, max_new_tokens=args.max_tokens))
+
+    if selecting is None:
+        return "", speculation
+
+    try:
+        results = await selecting
+    except BaseException:
+        if speculation is not None:
+            await speculation.aclose()
+        raise
+
+    if speculation is not None:
+        if not results.items():
+            return "", speculation
+
+        await speculation.aclose()
+
+    chat = _create_chat(args)
+    context, response = _apply_agent_results(chat, results)
+
+    if response:
+        return response, None
+
+    _format_context(chat, context + memory_context)
+    return "", _Speculation(llm.achat_stream(chat, stopping_strings=stop, max_new_tokens=args.max_tokens))
+
+
+@completionRouter.post("/chat/completions", response_model=OpenAIChatCompletionResponse)
+async def openai_chat_completion(req: Request, args: OpenAIChatCompletion, llm: LLMInterface, memory: ActiveMemory):
+    res_id = f"chatcmpl-{uuid4().hex}"
+    stop = args.stop if isinstance(args.stop, list) else [args.stop]
+    cmpl_response = OpenAIChatCompletionResponse(
+        id=res_id, object="chat.completion", created=round(datetime.now(UTC).timestamp()), choices=[]
+    )
+
+    available_agents = resolve_agents(args.tools, auto_llama_config.agents)
+    stream = None
+
+    if settings.PIPELINE:
+        response, stream = await _pipelined_chat(args, llm, memory, available_agents, stop)
+    else:
+        response, chat = await _prepare_chat(args, memory, available_agents)
+
+    # Generate response from agent results instead of llm response
+    if response:
         cmpl_response.choices.append(
             OpenAIChatChoice(
-                index=0, message=OpenAIChatChoice.Message(role=OpenAIMessage.Role(msg.role), content=msg.message)
+                index=0, message=OpenAIChatChoice.Message(role=OpenAIMessage.Role.ASSISTANT, content=response)
             )
         )
 
@@ -109,35 +264,40 @@ def openai_chat_completion(req: Request, args: OpenAIChatCompletion, llm: LLMInt
 
         return EventSourceResponse(create_stream_response())
 
-    remembered = auto_llama_config.memory.remember(chat.last_from("user"))
-    context += "\n" + "\n".join([fact.get_formatted() for fact in remembered])
-    chat.format_system_message(context=context)
-
     if not args.stream:
-        response = llm.chat(chat, stopping_strings=stop, max_new_tokens=args.max_tokens).last
+        if stream is not None:
+            message = "".join([chunk async for chunk in stream])
+        else:
+            message = (await llm.achat(chat, stopping_strings=stop, max_new_tokens=args.max_tokens)).last.message
+
         cmpl_response.choices.append(
             OpenAIChatChoice(
                 index=0,
-                message=OpenAIChatChoice.Message(role=OpenAIMessage.Role(response.role), content=response.message),
+                message=OpenAIChatChoice.Message(role=OpenAIMessage.Role.ASSISTANT, content=message),
             )
         )
         return cmpl_response
 
-    stream = llm.chat_stream(chat, stopping_strings=stop, max_new_tokens=args.max_tokens)
+    if stream is None:
+        stream = llm.achat_stream(chat, stopping_strings=stop, max_new_tokens=args.max_tokens)
 
     async def create_stream_response(stream):
         # async with streaming_semaphore:
-        for el in stream:
-            if await req.is_disconnected():
-                break
-
-            cmpl_response.choices = [
-                (
-                    OpenAIChatStreamChoice(
-                        index=0, delta=OpenAIChatStreamChoice.Message(content=el, role=OpenAIMessage.Role.ASSISTANT)
+        try:
+            async for el in stream:
+                if await req.is_disconnected():
+                    break
+
+                cmpl_response.choices = [
+                    (
+                        OpenAIChatStreamChoice(
+                            index=0,
+                            delta=OpenAIChatStreamChoice.Message(content=el, role=OpenAIMessage.Role.ASSISTANT),
+                        )
                     )
-                )
-            ]
-            yield {"data": cmpl_response.model_dump_json()}
+                ]
+                yield {"data": cmpl_response.model_dump_json()}
+        finally:
+            await stream.aclose()
 
     return EventSourceResponse(create_stream_response(stream))
@@ -1,6 +1,10 @@
 from ._chat import Chat, ChatMessage, ChatRoles
-from ._llm import LLMInterface
+from ._columnar import ColumnarHistory
+from ._tokens import TokenCounter, approx_token_count
+from ._llm import LLMInterface, GenerationConfig
 from ._template import PromptTemplate
-from ._models import ModelLoader
+from ._models import ModelLoader, PrewarmProgress
+from ._model_host import ModelHost, RemoteModel
 from ._config import Config
 from ._logger import logger
+from ._metrics import Histogram, JSONLogSink, MetricsRegistry, MetricsSink, metrics
@@ -1,44 +1,64 @@
 from datetime import datetime
-from typing import Callable, Literal, TypeAlias
+from typing import TYPE_CHECKING, Callable
 from uuid import uuid4
 
-ChatRoles: TypeAlias = Literal["system", "user", "assistant"]
+from ._columnar import ColumnarHistory
+from ._message import ChatMessage, ChatRoles
+from ._tokens import TokenCounter, approx_token_count
 
+if TYPE_CHECKING:
+    from auto_llama_memory import ConversationMemory
 
-class ChatMessage:
-    """Chat message"""
 
-    def __init__(self, role: ChatRoles, message: str, date: datetime = None):
-        self.role = role
-        self.message = message
-        self.date = date or datetime.now()
+class Chat:
+    """Chat history
 
-    def to_string(self, name: str = None):
-        # return f"{self.date.isoformat()} - {name or self.role}: {self.message}"
-        return f"{name or self.role}: {self.message}"
+    The rendered prompt is cached incrementally. All messages except the last one are kept in a rendered prefix,
+    which is only extended when new messages are added. The last message is rendered on every access, because it is
+    usually still being edited (e.g. while streaming). Replacing the system message or truncating the chat only
+    updates the affected segments of the prefix.
 
+    The number of tokens of every rendered segment is tracked as well, which allows fitting the chat into a token
+    budget (see `fit`) without recounting the whole history.
 
-class Chat:
-    """Chat history"""
+    NOTE: If you edit a message other than the last one in place, call `invalidate_prompt` afterwards.
+
+    With `columnar=True` the history is stored in a compact `ColumnarHistory` instead of a list of `ChatMessage`
+    objects, which reduces the memory footprint of long-running chats.
+    """
 
-    _history: list[ChatMessage]
+    _history: list[ChatMessage] | ColumnarHistory
     _names: dict[ChatRoles, str]
     _listeners: dict[str, Callable[[ChatMessage, "Chat"], None]]
 
+    _prompt_prefix: str
+    _prompt_offsets: list[int]
+    _prompt_tokens: list[int]
+    _prompt_token_cnt: int
+    _prompt_tail: ChatMessage | None
+
     def __init__(
         self,
         system_message: str = None,
         names: dict[ChatRoles, str] = {"system": "system", "user": "user", "assistant": "assistant"},
+        token_counter: TokenCounter = approx_token_count,
+        columnar: bool = False,
     ):
         """
         Args:
             system_message (str): Initial system message (First message in the chat). Defaults to None.
             names (dict[ChatRoles, str]): Mapping from generic chat roles to displayed names.
+            token_counter (TokenCounter): Callback for counting tokens (e.g. using the tokenizer of the LLM).
+                Defaults to a fast approximation.
+            columnar (bool): Store the history in a compact `ColumnarHistory`. Defaults to False.
         """
 
-        self._history = []
+        self._history = ColumnarHistory() if columnar else []
+        self._summaries: set[ChatMessage] = set()
         self._listeners = {}
         self._names = names
+        self._token_counter = token_counter
+        self.invalidate_prompt()
         self._has_system_message = bool(system_message)
         if self._has_system_message:
             self.append("system", system_message)
@@ -51,14 +71,17 @@ class Chat:
         history: list[ChatMessage],
         system_message: str = None,
         names: dict[ChatRoles, str] = {"system": "system", "user": "user", "assistant": "assistant"},
+        token_counter: TokenCounter = approx_token_count,
+        columnar: bool = False,
     ):
         """Initialize a new chat from a chat history"""
 
         if not system_message and (len(history) > 0) and (history[0].role == "system"):
             system_message = history.pop(0).message
 
-        chat = cls(system_message, names)
-        chat._history = [*chat.history, *history]
+        chat = cls(system_message, names, token_counter, columnar)
+        chat._history.extend(history)
+        chat.invalidate_prompt()
         return chat
 
     @property
@@ -74,10 +97,125 @@ class Chat:
         NOTE: Instruction patterns are not supported yet!
         """
 
-        return "\n".join([chat_msg.to_string(self._names[chat_msg.role]) for chat_msg in self.history])
+        history = self.history
+
+        if not history:
+            return ""
+
+        self._sync_prompt_prefix()
+        last = self._render(history[-1])
+
+        return f"{self._prompt_prefix}\n{last}" if self._prompt_offsets else last
+
+    def _render(self, chat_msg: ChatMessage) -> str:
+        return chat_msg.to_string(self._names[chat_msg.role])
+
+    def _sync_prompt_prefix(self):
+        """Extend the rendered prefix with all messages except the last one"""
+
+        history = self.history
+        rendered = len(self._prompt_offsets)
+
+        # Rebuild if the history was changed without updating the prefix
+        if rendered > len(history) or (rendered and history[rendered - 1] != self._prompt_tail):
+            self.invalidate_prompt()
+
+        self._trim_prompt_prefix()
+        rendered = len(self._prompt_offsets)
+
+        if rendered >= len(history) - 1:
+            return
+
+        parts = [self._prompt_prefix] if rendered else []
+        offset = len(self._prompt_prefix) + 1 if rendered else 0
+
+        for chat_msg in history[rendered:-1]:
+            segment = self._render(chat_msg)
+            parts.append(segment)
+
+            self._prompt_offsets.append(offset)
+            offset += len(segment) + 1
+
+            tokens = self._token_counter(segment)
+            self._prompt_tokens.append(tokens)
+            self._prompt_token_cnt += tokens
+
+        self._prompt_prefix = "\n".join(parts)
+        self._prompt_tail = history[-2]
+
+    def _replace_prompt_segment(self, index: int, chat_msg: ChatMessage):
+        """Replace the rendered segment of a single message in the prefix"""
+
+        offsets = self._prompt_offsets
+
+        if index >= len(offsets):
+            return
+
+        start = offsets[index]
+        end = offsets[index + 1] - 1 if index + 1 < len(offsets) else len(self._prompt_prefix)
+        segment = self._render(chat_msg)
+        shift = len(segment) - (end - start)
+
+        self._prompt_prefix = self._prompt_prefix[:start] + segment + self._prompt_prefix[end:]
+        for i in range(index + 1, len(offsets)):
+            offsets[i] += shift
+
+        tokens = self._token_counter(segment)
+        self._prompt_token_cnt += tokens - self._prompt_tokens[index]
+        self._prompt_tokens[index] = tokens
+
+        if index == len(offsets) - 1:
+            self._prompt_tail = chat_msg
+
+    def _remove_prompt_segments(self, start: int, end: int):
+        """Remove the rendered segments of messages start to end (exclusive) from the prefix"""
+
+        offsets = self._prompt_offsets
+        end = min(end, len(offsets))
+
+        if start >= end:
+            return
+
+        self._prompt_token_cnt -= sum(self._prompt_tokens[start:end])
+        del self._prompt_tokens[start:end]
+
+        if end < len(offsets):
+            shift = offsets[end] - offsets[start]
+            self._prompt_prefix = self._prompt_prefix[: offsets[start]] + self._prompt_prefix[offsets[end] :]
+            self._prompt_offsets = offsets[:start] + [offset - shift for offset in offsets[end:]]
+            return
+
+        self._prompt_prefix = self._prompt_prefix[: max(offsets[start] - 1, 0)]
+        self._prompt_offsets = offsets[:start]
+        self._prompt_tail = self._history[start - 1] if start > 0 else None
+
+    def _trim_prompt_prefix(self):
+        """Ensure the last message is not part of the prefix, so it can still be edited (e.g. after truncation)"""
+
+        if self._history and len(self._prompt_offsets) >= len(self._history):
+            self._remove_prompt_segments(len(self._history) - 1, len(self._prompt_offsets))
+
+    def invalidate_prompt(self):
+        """Drop the cached prompt. It will be rebuilt on the next access of `prompt`"""
+
+        self._prompt_prefix = ""
+        self._prompt_offsets = []
+        self._prompt_tokens = []
+        self._prompt_token_cnt = 0
+        self._prompt_tail = None
+
+    @property
+    def tokens(self) -> int:
+        """Number of tokens in the formatted chat prompt (counted with the `token_counter` of the chat)"""
+
+        if not self.history:
+            return 0
+
+        self._sync_prompt_prefix()
+        return self._prompt_token_cnt + self._token_counter(self._render(self.history[-1]))
 
     @property
-    def history(self) -> list[ChatMessage]:
+    def history(self) -> list[ChatMessage] | ColumnarHistory:
         """chat history"""
 
         return self._history
@@ -114,8 +252,10 @@ class Chat:
     def append(self, role: ChatRoles, message: str, date: datetime = None):
         """Add message to the chat history"""
 
-        chat_message = ChatMessage(role, message, date)
-        self._history.append(chat_message)
+        self._history.append(ChatMessage(role, message, date))
+
+        # Views of a `ColumnarHistory` write through to the history
+        chat_message = self._history[-1]
 
         for listener in self._listeners.values():
             listener(chat_message, self)
@@ -137,6 +277,10 @@ class Chat:
             The message wil be included if the function returns `True`
         """
 
+        if isinstance(self._history, ColumnarHistory):
+            indices = self._history.indices(include_roles, exclude_roles)
+            return [chat_msg for chat_msg in map(self._history.__getitem__, indices) if filter_cb(chat_msg)]
+
         return [
             chat_msg
             for chat_msg in self.history
@@ -161,12 +305,54 @@ class Chat:
             raise ValueError("Could not find system message")
 
         self._history[0] = ChatMessage("system", system_message)
+        self._replace_prompt_segment(0, self._history[0])
 
         return system_message
 
+    def attach_context(
+        self, context: str, role: ChatRoles = "user", template: str = "{message}\n\n{context}"
+    ) -> ChatMessage | None:
+        """Attach per-turn context to the latest message of a role instead of the system message
+
+        Unlike `format_system_message(context=...)`, the system message and all earlier messages stay byte-stable
+        between turns, so the prompt prefix cache (KV cache) of the LLM backend can be reused. The context is
+        appended after the message, so the message itself is still part of the reusable prefix in the next turn.
+
+        Args:
+            context (str): Context for the current turn. Nothing is attached if it is empty.
+            role (ChatRoles): Role of the message the context should be attached to. Defaults to "user".
+            template (str): Format of the resulting message (with the fields `message` and `context`)
+
+        Returns:
+            message (ChatMessage | None): Updated message or None if nothing was attached
+        """
+
+        if not context:
+            return None
+
+        for index in range(len(self._history) - 1, -1, -1):
+            if self._history[index].role == role:
+                break
+        else:
+            return None
+
+        chat_msg = self._history[index]
+        chat_msg.message = template.format(message=chat_msg.message, context=context)
+        self._replace_prompt_segment(index, chat_msg)
+
+        return chat_msg
+
     def last_from(self, role: ChatRoles) -> str:
         """Return last chat message of a given role"""
 
+        if isinstance(self._history, ColumnarHistory):
+            index = self._history.last_index(role)
+
+            if index < 0:
+                raise ValueError(f"No message found for role '{role}'")
+
+            return self._history[index].message
+
         for chat_msg in reversed(self.history):
             if chat_msg.role == role:
                 return chat_msg.message
@@ -179,13 +365,19 @@ class Chat:
         WARNING: No deep copy of ChatMessages
         """
 
-        new_chat = Chat(self._names)
+        new_chat = Chat(
+            names=self._names,
+            token_counter=self._token_counter,
+            columnar=isinstance(self._history, ColumnarHistory),
+        )
 
         if end:
             new_chat._history = self._history[start:end]
         else:
             new_chat._history = self._history[start:]
 
+        new_chat._summaries = set(self._summaries)
+        new_chat.invalidate_prompt()
         return new_chat
 
     def trunc(self, max_len: int) -> list[ChatMessage]:
@@ -201,7 +393,86 @@ class Chat:
             return []
 
         start = 1 if self._has_system_message else 0
-        return [self._history.pop(start) for _ in range(start, start + (self.len - max_len))]
+        end = start + (self.len - max_len)
+
+        deleted = list(self._history[start:end])
+        del self._history[start:end]
+        self._remove_prompt_segments(start, end)
+        self._trim_prompt_prefix()
+
+        return deleted
+
+    def fit(
+        self,
+        max_tokens: int,
+        memory: "ConversationMemory" = None,
+        summarizer: Callable[[list[ChatMessage]], str] = None,
+        summary_tokens: int = 128,
+    ) -> list[ChatMessage]:
+        """Evict the oldest messages, so the chat prompt fits into a token budget
+
+        Ignores the system message. The last message is never evicted.
+
+        Args:
+            max_tokens (int): Token budget of the chat prompt
+            memory (ConversationMemory): Evicted messages will be saved to this memory. Defaults to None.
+            summarizer (Callable[[list[ChatMessage]], str]): Summarizes the evicted messages. The summary is inserted
+                as system message in place of the evicted messages (see `is_summary`). Defaults to None.
+            summary_tokens (int): Tokens reserved for the summary message when evicting. A longer summary can make the
+                prompt exceed the budget. Defaults to 128.
+
+        Summaries of earlier evictions are evicted like other messages, but they are neither summarized again nor
+        saved to the memory.
+
+        Returns:
+            deleted (list[ChatMessage]): Evicted chat messages (without earlier summaries)
+        """
+
+        start = 1 if self._has_system_message else 0
+
+        # Evict room for the summary up front, so all evicted messages are summarized in one call
+        if summarizer and self.tokens > max_tokens:
+            max_tokens -= summary_tokens
+
+        deleted = []
+
+        for chat_msg in self._evict(start, max_tokens):
+            if chat_msg in self._summaries:
+                self._summaries.discard(chat_msg)
+            else:
+                deleted.append(chat_msg)
+
+        if deleted and summarizer:
+            self._history.insert(start, ChatMessage("system", summarizer(deleted)))
+            self._summaries.add(self._history[start])
+            self.invalidate_prompt()
+
+        if deleted and memory:
+            memory.save(Chat.from_history(list(deleted), names=self._names))
+
+        return deleted
+
+    def is_summary(self, chat_msg: ChatMessage) -> bool:
+        """Check if a message is a summary of evicted messages inserted by `fit` (not a real system message)"""
+
+        return chat_msg in self._summaries
+
+    def _evict(self, start: int, max_tokens: int) -> list[ChatMessage]:
+        """Delete messages from `start` onwards (in one slice) until the prompt fits into `max_tokens`"""
+
+        excess = self.tokens - max_tokens
+
+        # The prefix covers all messages except the last one
+        end = start
+        while excess > 0 and end < len(self._prompt_tokens):
+            excess -= self._prompt_tokens[end]
+            end += 1
+
+        deleted = list(self._history[start:end])
+        del self._history[start:end]
+        self._remove_prompt_segments(start, end)
+
+        return deleted
 
     def new_message_listener(self, listener: Callable[[ChatMessage, "Chat"], None]) -> str:
         """Register a callback which will be called every time a new message is added to the chat
@@ -0,0 +1,269 @@
+from array import array
+from collections.abc import MutableSequence
+from itertools import count
+from typing import Iterable, Iterator
+
+from ._message import ChatMessage, ChatRoles
+
+_message_ids = count()
+
+
+class _ColumnarMessage(ChatMessage):
+    """Chat message stored in a `ColumnarHistory`
+
+    Reads and writes go directly to the columns of the history. The view is bound to the position of the message,
+    so it should not be kept across insertions or deletions of earlier messages.
+    """
+
+    __slots__ = ("_history", "_index", "_id")
+
+    def __init__(self, history: "ColumnarHistory", index: int):
+        self._history = history
+        self._index = index
+        self._id = history._ids[index]
+
+    @property
+    def role(self) -> ChatRoles:
+        return self._history._role_names[self._history._roles[self._index]]
+
+    @role.setter
+    def role(self, role: ChatRoles):
+        self._history._roles[self._index] = self._history._role_code(role)
+
+    @property
+    def message(self) -> str:
+        return self._history._text(self._index)
+
+    @message.setter
+    def message(self, message: str):
+        self._history._set_text(self._index, message)
+
+    @property
+    def timestamp(self) -> int:
+        return self._history._timestamps[self._index]
+
+    @timestamp.setter
+    def timestamp(self, timestamp: int):
+        self._history._timestamps[self._index] = timestamp
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, _ColumnarMessage):
+            return NotImplemented
+
+        return self._id == other._id
+
+    def __hash__(self) -> int:
+        return hash(self._id)
+
+
+class ColumnarHistory(MutableSequence):
+    """Compact chat history backend
+
+    Messages are stored column wise: role codes and timestamps in arrays and all texts in one UTF-8 buffer with an
+    offset per message. Accessing an item returns a view (`ChatMessage`) which reads from and writes to the columns.
+    Slicing returns a new `ColumnarHistory`.
+
+    Use it with `Chat(columnar=True)`.
+    """
+
+    def __init__(self, messages: Iterable[ChatMessage] = ()) -> None:
+        self._role_names: list[ChatRoles | None] = []
+        self._role_codes: dict[ChatRoles | None, int] = {}
+
+        self._roles = array("B")
+        self._timestamps = array("q")
+        self._ids = array("Q")
+        self._offsets = array("Q")
+        self._buffer = bytearray()
+
+        self.extend(messages)
+
+    def _role_code(self, role: ChatRoles | None) -> int:
+        code = self._role_codes.get(role, None)
+
+        if code is None:
+            code = len(self._role_names)
+            self._role_names.append(role)
+            self._role_codes[role] = code
+
+        return code
+
+    def _span(self, index: int) -> tuple[int, int]:
+        """Start and end of the text of a message in the buffer"""
+
+        end = self._offsets[index + 1] if index + 1 < len(self._offsets) else len(self._buffer)
+        return self._offsets[index], end
+
+    def _text(self, index: int) -> str:
+        start, end = self._span(index)
+        return self._buffer[start:end].decode()
+
+    def _set_text(self, index: int, text: str):
+        start, end = self._span(index)
+        encoded = text.encode()
+
+        if end == len(self._buffer):
+            # Fast path for the last message (e.g. while streaming)
+            del self._buffer[start:]
+            self._buffer += encoded
+            return
+
+        self._buffer[start:end] = encoded
+        self._shift_offsets(index + 1, len(encoded) - (end - start))
+
+    def _shift_offsets(self, start: int, shift: int):
+        offsets = self._offsets
+
+        for i in range(start, len(offsets)):
+            offsets[i] += shift
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    def __getitem__(self, index: int | slice) -> "ChatMessage | ColumnarHistory":
+        if isinstance(index, slice):
+            return self._slice(*index.indices(len(self)))
+
+        return _ColumnarMessage(self, self._index(index))
+
+    def _slice(self, start: int, stop: int, step: int) -> "ColumnarHistory":
+        new = ColumnarHistory()
+        new._role_names = list(self._role_names)
+        new._role_codes = dict(self._role_codes)
+
+        if step != 1:
+            for i in range(start, stop, step):
+                new._append(self._roles[i], self._timestamps[i], self._ids[i], self._buffer[slice(*self._span(i))])
+
+            return new
+
+        if start >= stop:
+            return new
+
+        begin = self._offsets[start]
+        end = self._span(stop - 1)[1]
+
+        new._roles = self._roles[start:stop]
+        new._timestamps = self._timestamps[start:stop]
+        new._ids = self._ids[start:stop]
+        new._offsets = array("Q", (offset - begin for offset in self._offsets[start:stop]))
+        new._buffer = self._buffer[begin:end]
+
+        return new
+
+    def _append(self, role: int, timestamp: int, id: int, text: bytes):
+        self._roles.append(role)
+        self._timestamps.append(timestamp)
+        self._ids.append(id)
+        self._offsets.append(len(self._buffer))
+        self._buffer += text
+
+    def __setitem__(self, index: int, message: ChatMessage):
+        if isinstance(index, slice):
+            raise TypeError("ColumnarHistory does not support slice assignment")
+
+        index = self._index(index)
+
+        self._roles[index] = self._role_code(message.role)
+        self._timestamps[index] = message.timestamp
+        self._ids[index] = next(_message_ids)
+        self._set_text(index, message.message)
+
+    def __delitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+
+            if step != 1:
+                for i in sorted(range(start, stop, step), reverse=True):
+                    del self[i]
+                return
+        else:
+            start = self._index(index)
+            stop = start + 1
+
+        if start >= stop:
+            return
+
+        begin = self._offsets[start]
+        end = self._span(stop - 1)[1]
+
+        del self._roles[start:stop]
+        del self._timestamps[start:stop]
+        del self._ids[start:stop]
+        del self._offsets[start:stop]
+        del self._buffer[begin:end]
+
+        self._shift_offsets(start, begin - end)
+
+    def insert(self, index: int, message: ChatMessage):
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        encoded = message.message.encode()
+
+        if index == len(self):
+            self._append(self._role_code(message.role), message.timestamp, next(_message_ids), encoded)
+            return
+
+        offset = self._offsets[index]
+
+        self._roles.insert(index, self._role_code(message.role))
+        self._timestamps.insert(index, message.timestamp)
+        self._ids.insert(index, next(_message_ids))
+        self._offsets.insert(index, offset)
+        self._buffer[offset:offset] = encoded
+
+        self._shift_offsets(index + 1, len(encoded))
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        for i in range(len(self)):
+            yield _ColumnarMessage(self, i)
+
+    def __reversed__(self) -> Iterator[ChatMessage]:
+        for i in reversed(range(len(self))):
+            yield _ColumnarMessage(self, i)
+
+    def indices(self, include_roles: Iterable[ChatRoles | None], exclude_roles: Iterable[ChatRoles | None] = ()):
+        """Indices of all messages with one of the given roles (without creating message views)"""
+
+        codes = {self._role_codes[role] for role in include_roles if role in self._role_codes}
+        codes -= {self._role_codes[role] for role in exclude_roles if role in self._role_codes}
+
+        return [i for i, code in enumerate(self._roles) if code in codes]
+
+    def last_index(self, role: ChatRoles) -> int:
+        """Index of the last message with the given role. Returns -1 if there is no such message"""
+
+        code = self._role_codes.get(role, None)
+
+        if code is not None:
+            for i in range(len(self._roles) - 1, -1, -1):
+                if self._roles[i] == code:
+                    return i
+
+        return -1
+
+    def materialize(self, index: int) -> ChatMessage:
+        """Return an independent `ChatMessage` copy of a message"""
+
+        index = self._index(index)
+        msg = ChatMessage(self._role_names[self._roles[index]], self._text(index))
+        msg.timestamp = self._timestamps[index]
+
+        return msg
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the columns in bytes"""
+
+        columns = (self._roles, self._timestamps, self._ids, self._offsets)
+        return sum(col.itemsize * len(col) for col in columns) + len(self._buffer)
+
+    def __repr__(self) -> str:
+        return f"ColumnarHistory({len(self)} messages, {self.nbytes()} bytes)"
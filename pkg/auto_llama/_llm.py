@@ -1,11 +1,58 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Generator
+from dataclasses import dataclass, replace
+from typing import Any, AsyncGenerator, Generator
 
 from ._chat import Chat
 
 
+@dataclass(frozen=True)
+class GenerationConfig:
+    """Immutable generation parameters
+
+    Per-call parameters are merged into a new instance (see `merge`), so one config can be shared safely between
+    threads and concurrent requests.
+    """
+
+    stop: tuple[str, ...] = ()
+    max_tokens: int = 200
+    temperature: float | None = None
+    seed: int | None = None
+
+    def merge(self, stopping_strings: list[str] = [], max_new_tokens: int = None) -> "GenerationConfig":
+        """Return a new config for a single call
+
+        stopping_strings will extend the default stopping strings,
+        max_new_tokens will overwrite  the default configuration
+        """
+
+        return replace(
+            self,
+            stop=(*stopping_strings, *self.stop) if stopping_strings else self.stop,
+            max_tokens=max_new_tokens or self.max_tokens,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Parameters as keyword arguments for the OpenAI API (unset parameters are omitted)"""
+
+        params = {"max_tokens": self.max_tokens}
+
+        if self.stop:
+            params["stop"] = list(self.stop)
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        if self.seed is not None:
+            params["seed"] = self.seed
+
+        return params
+
+
 class LLMInterface(ABC):
-    """Generic  LLM Interface"""
+    """Generic  LLM Interface
+
+    The async methods (`acompletion`, `acompletion_stream`, `achat`, `achat_stream`) fall back to running the
+    blocking methods in a worker thread. Implementations with a native async client should override them.
+    """
 
     @abstractmethod
     def completion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
@@ -56,3 +103,64 @@ class LLMInterface(ABC):
             res.close()
 
         return res
+
+    async def acompletion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
+        """Async version of `completion`"""
+
+        return await asyncio.to_thread(self.completion, prompt, stopping_strings, max_new_tokens)
+
+    async def acompletion_stream(
+        self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        """Async version of `completion_stream`"""
+
+        res = self.completion_stream(prompt, stopping_strings, max_new_tokens)
+
+        async for chunk in _iterate_in_thread(res):
+            yield chunk
+
+    async def achat(self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None) -> Chat:
+        """Async version of `chat`"""
+
+        prompt = chat.prompt
+        res = await self.acompletion(prompt, stopping_strings, max_new_tokens)
+        chat.append("assistant", res)
+
+        return chat
+
+    async def achat_stream(
+        self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        """Async version of `chat_stream`"""
+
+        prompt = chat.prompt
+        res = self.acompletion_stream(prompt, stopping_strings, max_new_tokens)
+        chat.append("assistant", "")
+
+        try:
+            async for chunk in res:
+                chat.last.message += chunk
+                yield chunk
+        finally:
+            await res.aclose()
+
+
+async def _iterate_in_thread(stream: Generator[str, None, None]) -> AsyncGenerator[str, None]:
+    """Consume a blocking generator without blocking the event loop"""
+
+    done = object()
+
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, stream, done)
+
+            if chunk is done:
+                break
+
+            yield chunk
+    finally:
+        try:
+            stream.close()
+        except ValueError:
+            # Cancelled while the worker thread is still inside `next`
+            pass
@@ -0,0 +1,53 @@
+import sys
+from datetime import datetime, timedelta
+from typing import Literal, TypeAlias
+
+ChatRoles: TypeAlias = Literal["system", "user", "assistant"]
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_timestamp(date: datetime = None) -> int:
+    """Convert a date to microseconds since 1970-01-01 (local time). Defaults to the current time."""
+
+    if date is None:
+        date = datetime.now()
+    elif date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+
+    return (date - _EPOCH) // _MICROSECOND
+
+
+def from_timestamp(timestamp: int) -> datetime:
+    """Convert microseconds since 1970-01-01 (local time) to a date"""
+
+    return _EPOCH + timestamp * _MICROSECOND
+
+
+class ChatMessage:
+    """Chat message
+
+    Uses `__slots__`, interned role names and an integer timestamp to keep the per message overhead low.
+    """
+
+    __slots__ = ("role", "message", "timestamp")
+
+    def __init__(self, role: ChatRoles, message: str, date: datetime = None):
+        self.role = sys.intern(role) if role else role
+        self.message = message
+        self.timestamp = to_timestamp(date)
+
+    @property
+    def date(self) -> datetime:
+        """Date of the message"""
+
+        return from_timestamp(self.timestamp)
+
+    @date.setter
+    def date(self, date: datetime):
+        self.timestamp = to_timestamp(date)
+
+    def to_string(self, name: str = None):
+        # return f"{self.date.isoformat()} - {name or self.role}: {self.message}"
+        return f"{name or self.role}: {self.message}"
@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+from ._logger import logger
+
+Labels = dict[str, str]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Histogram with fixed bucket boundaries (same semantics as a Prometheus histogram)"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Cumulative counts per upper bound (the last bound is infinity)"""
+
+        res = []
+        total = 0
+
+        for bound, cnt in zip((*self.buckets, float("inf")), self.counts):
+            total += cnt
+            res.append((bound, total))
+
+        return res
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile (upper bound of the bucket containing it)"""
+
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+
+        return float("inf")
+
+
+class MetricsSink(ABC):
+    """Receiver of metric observations"""
+
+    def describe(self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """Register the description and histogram buckets of a metric"""
+
+    @abstractmethod
+    def observe(self, name: str, value: float, labels: Labels = {}):
+        """Add a value to a histogram"""
+
+    @abstractmethod
+    def increment(self, name: str, value: float = 1, labels: Labels = {}):
+        """Increase a counter"""
+
+
+class MetricsRegistry(MetricsSink):
+    """In-process metrics registry
+
+    Aggregates observations into histograms and counters, which can be exported as a dictionary (`snapshot`) or in
+    the Prometheus text format (`to_prometheus`).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: dict[str, str] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._counters: dict[str, dict[tuple, float]] = {}
+
+    def describe(self, name: str, help: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        with self._lock:
+            self._help[name] = help
+            self._buckets[name] = buckets
+
+    def observe(self, name: str, value: float, labels: Labels = {}):
+        key = tuple(sorted(labels.items()))
+
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key, None)
+
+            if hist is None:
+                hist = series[key] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+
+            hist.observe(value)
+
+    def increment(self, name: str, value: float = 1, labels: Labels = {}):
+        key = tuple(sorted(labels.items()))
+
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def histogram(self, name: str, labels: Labels = {}) -> Histogram | None:
+        """Return the histogram of a metric or None if nothing was observed yet"""
+
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())), None)
+
+    def reset(self):
+        """Remove all observations"""
+
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """Current state of all metrics as json serializable dictionary"""
+
+        with self._lock:
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": hist.count,
+                        "sum": hist.sum,
+                        "p50": hist.quantile(0.5),
+                        "p95": hist.quantile(0.95),
+                        "p99": hist.quantile(0.99),
+                        "buckets": {_format_bound(bound): cnt for bound, cnt in hist.cumulative()},
+                    }
+                    for key, hist in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+
+        return {"histograms": histograms, "counters": counters}
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+
+        lines = []
+
+        with self._lock:
+            for name, series in self._histograms.items():
+                lines.extend(self._header(name, "histogram"))
+
+                for key, hist in series.items():
+                    for bound, cnt in hist.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key, le=_format_bound(bound))} {cnt}")
+
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+
+            for name, series in self._counters.items():
+                lines.extend(self._header(name, "counter"))
+
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _header(self, name: str, type: str) -> list[str]:
+        help = self._help.get(name, None)
+        return ([f"# HELP {name} {help}"] if help else []) + [f"# TYPE {name} {type}"]
+
+
+class JSONLogSink(MetricsSink):
+    """Write every observation as a single JSON line
+
+    Lines are appended to a file or, if no path is given, written to the verbose log of the `logger`.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, labels: Labels = {}):
+        self._write({"type": "histogram", "name": name, "value": value, "labels": labels})
+
+    def increment(self, name: str, value: float = 1, labels: Labels = {}):
+        self._write({"type": "counter", "name": name, "value": value, "labels": labels})
+
+    def _write(self, record: dict):
+        line = json.dumps({"time": time.time(), **record})
+
+        if not self._path:
+            logger.println(line, verbose=True)
+            return
+
+        with self._lock, open(self._path, "a") as file:
+            file.write(line + "\n")
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _format_labels(key: tuple, **extra: str) -> str:
+    items = [*key, *extra.items()]
+
+    if not items:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+metrics = MetricsRegistry()
+"""Default in-process metrics registry"""
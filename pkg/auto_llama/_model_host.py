@@ -0,0 +1,261 @@
+import inspect
+import os
+import threading
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Connection, Listener
+from typing import TYPE_CHECKING, Any, Callable
+
+from ._logger import logger
+
+HAS_NUMPY = True
+
+try:
+    import numpy as np
+except ImportError:
+    HAS_NUMPY = False
+
+if TYPE_CHECKING:
+    from ._models import _ModelLoader
+
+
+@dataclass(frozen=True)
+class _SharedArray:
+    """Reference to a numpy array in a shared memory segment"""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+@dataclass(frozen=True)
+class _Encoded:
+    """Value of a type with a registered codec (see `ModelHost.register_codec`)"""
+
+    codec: str
+    data: Any
+
+
+_codecs: dict[str, tuple[type, Callable[[Any], Any], Callable[[Any], Any]]] = {}
+
+
+def _share(value: Any, min_bytes: int) -> Any:
+    """Move large numpy arrays (recursively in lists, tuples and dicts) into shared memory and encode values with a
+    registered codec"""
+
+    for name, (cls, encode, _) in _codecs.items():
+        if isinstance(value, cls):
+            return _Encoded(name, encode(value))
+
+    if HAS_NUMPY and isinstance(value, np.ndarray) and value.nbytes >= min_bytes and value.dtype != object:
+        segment = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        np.ndarray(value.shape, value.dtype, buffer=segment.buf)[...] = value
+
+        # The client unlinks the segment after copying it
+        resource_tracker.unregister(segment._name, "shared_memory")
+        segment.close()
+
+        return _SharedArray(segment.name, value.shape, value.dtype.str)
+
+    if isinstance(value, (list, tuple)):
+        return type(value)(_share(el, min_bytes) for el in value)
+    if isinstance(value, dict):
+        return {key: _share(el, min_bytes) for key, el in value.items()}
+
+    return value
+
+
+def _unshare(value: Any) -> Any:
+    """Copy shared arrays back into the process, release the shared memory and decode encoded values"""
+
+    if isinstance(value, _Encoded):
+        return _codecs[value.codec][2](value.data)
+
+    if isinstance(value, _SharedArray):
+        segment = shared_memory.SharedMemory(name=value.name)
+
+        try:
+            return np.ndarray(value.shape, np.dtype(value.dtype), buffer=segment.buf).copy()
+        finally:
+            segment.close()
+            segment.unlink()
+
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unshare(el) for el in value)
+    if isinstance(value, dict):
+        return {key: _unshare(el) for key, el in value.items()}
+
+    return value
+
+
+class ModelHost:
+    """Serve the models of a `ModelLoader` to other processes over a Unix socket
+
+    Other processes use the models with `ModelLoader.connect(address)`. Calls are executed in the host process, so
+    every model is only loaded once, independent of the number of worker processes. Large numpy arrays in the
+    results are transferred through shared memory, types with a registered codec (see `register_codec`) are
+    encoded, everything else is pickled.
+
+    Only methods of the models can be called, attributes starting with an underscore are refused. The socket is
+    only accessible to the user running the host.
+    """
+
+    def __init__(
+        self, loader: "_ModelLoader", address: str, authkey: bytes = None, min_shared_bytes: int = 64 * 1024
+    ) -> None:
+        """
+        Args:
+            loader (ModelLoader): Model loader providing the models
+            address (str): Path of the Unix socket
+            authkey (bytes): Key clients have to authenticate with. Defaults to None (no authentication)
+            min_shared_bytes (int): Minimum size of numpy arrays which are transferred through shared memory
+        """
+
+        self._loader = loader
+        self._address = address
+        self._authkey = authkey
+        self._min_shared_bytes = min_shared_bytes
+        self._listener: Listener | None = None
+
+    @staticmethod
+    def register_codec(cls: type, encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+        """Transfer results of a type in a custom format instead of pickling them
+
+        Both the host and the clients have to register the codec (e.g. when importing the module of the type).
+
+        Args:
+            cls (type): Type of the results (subclasses are encoded too)
+            encode (Callable[[Any], Any]): Converts a result into a picklable value (called in the host)
+            decode (Callable[[Any], Any]): Converts the encoded value back (called in the client)
+        """
+
+        _codecs[f"{cls.__module__}.{cls.__qualname__}"] = (cls, encode, decode)
+
+    def serve_forever(self):
+        """Accept connections until the host is closed (blocking)"""
+
+        if os.path.exists(self._address):
+            os.remove(self._address)
+
+        self._listener = Listener(self._address, family="AF_UNIX", authkey=self._authkey)
+        os.chmod(self._address, 0o600)
+        logger.println(f"ModelHost: Serving models on '{self._address}'", verbose=True)
+
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    break
+
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def start(self) -> threading.Thread:
+        """Serve models in a background thread"""
+
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+
+        return thread
+
+    def close(self):
+        """Stop accepting connections"""
+
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def _handle(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    name, path, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                try:
+                    if any(not isinstance(attr, str) or attr.startswith("_") for attr in path):
+                        raise AttributeError(f"Can't access private attribute '{'.'.join(map(str, path))}' remotely")
+
+                    target = self._loader.get(name)
+
+                    for attr in path:
+                        target = getattr(target, attr)
+
+                    if not callable(target):
+                        raise TypeError(
+                            f"'{'.'.join((name, *path))}' is not callable, only methods can be used remotely"
+                        )
+
+                    res = target(*args, **kwargs)
+
+                    # Generators can't be sent to the client
+                    if inspect.isgenerator(res):
+                        res = list(res)
+
+                    conn.send(("ok", _share(res, self._min_shared_bytes)))
+                except Exception as e:
+                    try:
+                        conn.send(("error", e))
+                    except Exception:
+                        conn.send(("error", RuntimeError(repr(e))))
+
+
+class ModelHostClient:
+    """Connection to a `ModelHost` (one socket per thread and process)"""
+
+    def __init__(self, address: str, authkey: bytes = None) -> None:
+        self._address = address
+        self._authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, "conn", None)
+
+        # Don't share a socket inherited from the parent process (fork)
+        if conn is None or self._local.pid != os.getpid():
+            conn = Client(self._address, family="AF_UNIX", authkey=self._authkey)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+
+        return conn
+
+    def call(self, name: str, path: tuple[str, ...], args: tuple, kwargs: dict) -> Any:
+        """Call a model (or one of its methods) in the host process"""
+
+        conn = self._connection()
+        conn.send((name, path, args, kwargs))
+        status, res = conn.recv()
+
+        if status == "error":
+            raise res
+
+        return _unshare(res)
+
+
+class RemoteModel:
+    """Proxy of a model in a `ModelHost`
+
+    Calling the proxy calls the model, attributes are resolved to proxies of its methods (e.g. `nlp.pipe(texts)`).
+    Arguments and results have to be picklable, generators are returned as lists. Other attributes (non-callables)
+    can't be used: their proxies raise a TypeError when called and can't be passed to local code.
+    """
+
+    def __init__(self, client: ModelHostClient, name: str, path: tuple[str, ...] = ()) -> None:
+        self._client = client
+        self._name = name
+        self._path = path
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self._client.call(self._name, self._path, args, kwargs)
+
+    def __getattr__(self, attr: str) -> "RemoteModel":
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+
+        return RemoteModel(self._client, self._name, (*self._path, attr))
+
+    def __repr__(self) -> str:
+        return f"RemoteModel({'.'.join((self._name, *self._path))})"
@@ -1,24 +1,156 @@
+import asyncio
+import gc
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, TypeVar, Type, cast, Callable
 
+from ._logger import logger
+from ._metrics import metrics
+from ._model_host import ModelHost, ModelHostClient, RemoteModel
+
+HAS_PSUTIL = True
+
+try:
+    import psutil
+except ImportError:
+    HAS_PSUTIL = False
+
 T = TypeVar("T")
 
 
+def _resident_memory() -> int:
+    """Resident set size of the process in bytes (0 if it can't be determined)"""
+
+    if HAS_PSUTIL:
+        return psutil.Process().memory_info().rss
+
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class PrewarmProgress:
+    """Progress of loading models in advance (see `ModelLoader.prewarm`)"""
+
+    def __init__(self, names: list[str]) -> None:
+        self.names = names
+        self.loaded: list[str] = []
+        self.failed: dict[str, Exception] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+        if not names:
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        """True if all models were loaded (or failed to load)"""
+
+        return self._done.is_set()
+
+    @property
+    def progress(self) -> float:
+        """Fraction of finished models"""
+
+        return (len(self.loaded) + len(self.failed)) / len(self.names) if self.names else 1.0
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until all models are loaded. Returns False if the timeout expired"""
+
+        return self._done.wait(timeout)
+
+    def _finish(self, name: str, error: Exception = None):
+        with self._lock:
+            if error is None:
+                self.loaded.append(name)
+            else:
+                self.failed[name] = error
+
+            if len(self.loaded) + len(self.failed) == len(self.names):
+                self._done.set()
+
+    def __repr__(self) -> str:
+        return f"PrewarmProgress({len(self.loaded)} loaded, {len(self.failed)} failed, {len(self.names)} total)"
+
+
 class _ModelLoader:
-    """Add larger ai models and provide them as singleton to reduce RAM/VRAM usage"""
+    """Add larger ai models and provide them as singleton to reduce RAM/VRAM usage
+
+    Loading is thread-safe and single-flight: every model is loaded only once, concurrent callers of `get` wait for
+    the running loader instead of starting their own.
 
-    _models: dict[str, Any] = {}
+    With a memory budget (see `configure`), the least recently used models are evicted when loading a new model
+    would exceed it. The size of a model is either given when adding it or measured as growth of the resident
+    memory of the process while loading it. Loads which are measured run one at a time, so they don't count each
+    other's allocations (the measurement is still approximate if other threads allocate at the same time).
+    Pinned models are never evicted. Hits, misses and evictions are counted in the global `metrics` registry.
+
+    Multiple processes can share the models of one process: the owning process serves them with `serve` and the
+    other processes call `connect`, after which `get` returns proxies (`RemoteModel`) to the served models.
+    """
+
+    _models: OrderedDict[str, Any] = OrderedDict()
     _lazy: dict[str, Callable] = {}
+    _loading: dict[str, threading.Lock] = {}
+    _measuring = threading.Lock()
+    _lock = threading.Lock()
+
+    _sizes: dict[str, int] = {}
+    _pinned: set[str] = set()
+    _local: set[str] = set()
+    _memory_budget: int | None = None
+    _stats = {"hits": 0, "misses": 0, "evictions": 0}
 
-    def add(self, name: str, lazy_loader: Callable):
+    _remote: ModelHostClient | None = None
+    _remote_names: set[str] | None = None
+
+    def configure(self, memory_budget: int = None) -> "_ModelLoader":
+        """Configure the model loader
+
+        Args:
+            memory_budget (int): Maximum memory of all loaded models in bytes. Defaults to None (unlimited)
+        """
+
+        self._memory_budget = memory_budget
+
+        with self._lock:
+            evicted = self._evict()
+
+        self._collect(evicted)
+
+        return self
+
+    def add(self, name: str, lazy_loader: Callable, size: int = None, pinned: bool = False, remote: bool = True):
         """Add new model.
 
         Raises ValueError if model with this name already exists
+
+        Args:
+            name (str): Name of the model
+            lazy_loader (Callable): Function which loads the model
+            size (int): Approximate memory used by the model in bytes. Measured on load if not given.
+            pinned (bool): Never evict the model. Defaults to False.
+            remote (bool): Use the model from the model host after `connect`. Defaults to True. Disable it for
+                small models which are called very often (e.g. per word), where every call would be a round trip.
         """
 
-        if self._lazy.get(name, None):
-            raise ValueError(f"Model with name '{name}' already exists")
+        with self._lock:
+            if name in self._lazy:
+                raise ValueError(f"Model with name '{name}' already exists")
+
+            self._lazy[name] = lazy_loader
+            self._loading[name] = threading.Lock()
 
-        self._lazy[name] = lazy_loader
+            if size is not None:
+                self._sizes[name] = size
+            if pinned:
+                self._pinned.add(name)
+            if not remote:
+                self._local.add(name)
 
     def get(self, name: str, py_type: Type[T] = Any) -> T:
         """Get the model singleton with the given name.
@@ -26,15 +158,148 @@ class _ModelLoader:
         Raises KeyError if model doesn't exist.
         """
 
-        if not self._models.get(name, None):
+        if self._remote is not None and self._is_remote(name):
+            return cast(py_type, RemoteModel(self._remote, name))
+
+        with self._lock:
+            if name in self._models:
+                return cast(py_type, self._hit(name))
+
             loader = self._lazy.get(name, None)
+            loading = self._loading.get(name, None)
+
+        if loader is None:
+            raise KeyError(f"Model with name '{name}' doesn't exist")
+
+        # Only one thread runs the loader, the others wait for it and use its result
+        with loading:
+            with self._lock:
+                if name in self._models:
+                    return cast(py_type, self._hit(name))
+
+                self._count("misses", name)
+                size = self._sizes.get(name, None)
 
-            if not loader:
-                raise KeyError(f"Model with name '{name}' doesn't exist")
+                # Make room in advance if the size is already known
+                evicted = self._evict(size or 0)
 
-            self._models[name] = loader()
+            self._collect(evicted)
 
-        return cast(py_type, self._models[name])
+            if size is None:
+                with self._measuring:
+                    before = _resident_memory()
+                    model = loader()
+                    size = max(_resident_memory() - before, 0)
+            else:
+                model = loader()
+
+            with self._lock:
+                self._sizes.setdefault(name, size)
+                self._models[name] = model
+                evicted = self._evict()
+
+            self._collect(evicted)
+
+            return cast(py_type, model)
+
+    async def aget(self, name: str, py_type: Type[T] = Any) -> T:
+        """Async version of `get`. Loads the model in a worker thread without blocking the event loop
+
+        Raises KeyError if model doesn't exist.
+        """
+
+        if name in self._models:
+            return self.get(name, py_type)
+
+        return await asyncio.to_thread(self.get, name, py_type)
+
+    def prewarm(
+        self,
+        names: list[str] = None,
+        background: bool = True,
+        max_workers: int = 2,
+        callback: Callable[[str, PrewarmProgress], None] = None,
+    ) -> PrewarmProgress:
+        """Load models in advance on a thread pool (e.g. at startup), so the first request doesn't pay for it
+
+        Args:
+            names (list[str]): Names of the models. Defaults to None (all added models)
+            background (bool): Return immediately instead of waiting for the models. Defaults to True.
+            max_workers (int): Number of models loaded in parallel. Defaults to 2. Models added without a size are
+                still loaded one at a time, because their size is measured.
+            callback (Callable[[str, PrewarmProgress], None]): Called after each model finished loading
+
+        Returns:
+            progress (PrewarmProgress): Progress of loading the models. Failed models are recorded, not raised.
+        """
+
+        names = list(self._lazy) if names is None else list(names)
+        progress = PrewarmProgress(names)
+
+        def load(name: str):
+            try:
+                self.get(name)
+                error = None
+            except Exception as e:
+                error = e
+
+            progress._finish(name, error)
+            status = "done" if error is None else f"failed ({error!r})"
+            logger.println(f"ModelLoader: Prewarming '{name}' {status} [{progress.progress:.0%}]", verbose=True)
+
+            if callback:
+                callback(name, progress)
+
+        if names:
+            executor = ThreadPoolExecutor(max_workers, thread_name_prefix="prewarm")
+
+            for name in names:
+                executor.submit(load, name)
+
+            executor.shutdown(wait=not background)
+
+        return progress
+
+    def serve(self, address: str, authkey: bytes = None, background: bool = False) -> ModelHost:
+        """Serve the models of this process to other processes over a Unix socket (see `connect`)
+
+        Args:
+            address (str): Path of the Unix socket
+            authkey (bytes): Key clients have to authenticate with. Defaults to None (no authentication)
+            background (bool): Serve in a background thread instead of blocking. Defaults to False.
+        """
+
+        host = ModelHost(self, address, authkey)
+
+        if background:
+            host.start()
+        else:
+            host.serve_forever()
+
+        return host
+
+    def connect(self, address: str, authkey: bytes = None, names: list[str] = None) -> "_ModelLoader":
+        """Use the models served by another process (see `serve`) instead of loading them
+
+        Errors of the remote models (including unknown models) are raised when the proxy is called.
+
+        Args:
+            address (str): Path of the Unix socket of the model host
+            authkey (bytes): Key for authenticating with the host. Defaults to None
+            names (list[str]): Models which should be used remotely. Defaults to None (all models which weren't added
+                with `remote=False`)
+        """
+
+        self._remote = ModelHostClient(address, authkey)
+        self._remote_names = set(names) if names is not None else None
+
+        return self
+
+    def disconnect(self):
+        """Load models in this process again"""
+
+        self._remote = None
+        self._remote_names = None
 
     def drop(self, name: str, py_type: Type[T] = Any) -> T:
         """Drop the model singleton with the given name.
@@ -42,21 +307,115 @@ class _ModelLoader:
         Raises KeyError if model doesn't exist.
         """
 
-        loader = self._lazy.pop(name, None)
-        model = self._models.pop(name, None)
+        with self._lock:
+            loader = self._lazy.pop(name, None)
+            loading = self._loading.pop(name, None)
 
-        if not loader:
+        if loader is None:
             raise KeyError(f"Model with name '{name}' doesn't exist")
 
-        if not model:
-            model = loader()
+        # Wait for a running loader
+        with loading:
+            with self._lock:
+                self._sizes.pop(name, None)
+                self._pinned.discard(name)
+                self._local.discard(name)
+                loaded = name in self._models
+                model = self._models.pop(name, None)
+
+            # A model which isn't loaded is loaded without the global lock, so other models aren't blocked
+            if not loaded:
+                model = loader()
 
-        return cast(py_type, model)
+            return cast(py_type, model)
 
     def exists(self, name: str) -> bool:
         """Check if model with the given name exists"""
 
-        return self._lazy.get(name, None) is not None
+        return name in self._lazy
+
+    def pin(self, name: str):
+        """Never evict the model with the given name
+
+        Raises KeyError if model doesn't exist.
+        """
+
+        if not self.exists(name):
+            raise KeyError(f"Model with name '{name}' doesn't exist")
+
+        self._pinned.add(name)
+
+    def unpin(self, name: str):
+        """Allow evicting the model with the given name again"""
+
+        self._pinned.discard(name)
+
+    def stats(self) -> dict[str, Any]:
+        """Cache statistics: hits, misses, evictions, loaded models with their sizes and the memory budget"""
+
+        with self._lock:
+            return {
+                **self._stats,
+                "loaded": {name: self._sizes.get(name, 0) for name in self._models},
+                "pinned": sorted(self._pinned),
+                "memory": self._memory_used(),
+                "memory_budget": self._memory_budget,
+            }
+
+    def _is_remote(self, name: str) -> bool:
+        if self._remote_names is not None:
+            return name in self._remote_names
+
+        return name not in self._local
+
+    def _hit(self, name: str) -> Any:
+        self._models.move_to_end(name)
+        self._count("hits", name)
+
+        return self._models[name]
+
+    def _count(self, stat: str, name: str):
+        self._stats[stat] += 1
+        metrics.increment(f"auto_llama_models_{stat}_total", labels={"model": name})
+
+    def _memory_used(self) -> int:
+        return sum(self._sizes.get(name, 0) for name in self._models)
+
+    def _evict(self, required: int = 0) -> bool:
+        """Evict least recently used models until `required` more bytes fit into the memory budget
+
+        Returns True if models were evicted (call `_collect` after releasing the lock).
+        """
+
+        if self._memory_budget is None:
+            return False
+
+        used = self._memory_used()
+        evicted = False
+
+        for name in list(self._models):
+            if used + required <= self._memory_budget:
+                break
+
+            if name in self._pinned:
+                continue
+
+            # The most recently loaded model stays, even if it exceeds the budget on its own
+            if required == 0 and name == next(reversed(self._models)):
+                break
+
+            del self._models[name]
+            used -= self._sizes.get(name, 0)
+            evicted = True
+            self._count("evictions", name)
+
+        return evicted
+
+    def _collect(self, evicted: bool):
+        """Free the memory of evicted models (without holding the lock, so cache hits aren't blocked)"""
+
+        if evicted:
+            gc.collect()
 
 
 ModelLoader = _ModelLoader()
@@ -0,0 +1,10 @@
+from typing import Callable, TypeAlias
+
+TokenCounter: TypeAlias = Callable[[str], int]
+"""Callback returning the number of tokens in a text (e.g. `lambda text: len(tokenizer.encode(text))`)"""
+
+
+def approx_token_count(text: str) -> int:
+    """Fast approximation of the number of tokens in a text (~4 characters per token for english text)"""
+
+    return (len(text) + 3) // 4
@@ -1,3 +1,6 @@
 """Different solutions for accessing an LLM"""
 
 from ._openai import LocalOpenAILLM
+from ._batching import CompletionBatcher
+from ._cache import CachedLLM, PromptCache
+from ._instrumented import InstrumentedLLM, LLM_METRICS
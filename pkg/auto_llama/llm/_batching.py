@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import Future
+from typing import Any
+
+from auto_llama import GenerationConfig
+
+
+class CompletionBatcher:
+    """Coalesce concurrent completion requests into batched calls of the OpenAI completions endpoint
+
+    Requests which arrive within `window` seconds and share the same generation parameters (stop, max_tokens, ...)
+    are send as one request with a list of prompts. Every caller receives the choice belonging to its prompt.
+    """
+
+    def __init__(self, client: Any, window: float = 0.005, max_batch_size: int = 32, model: str = "NONE") -> None:
+        """
+        Args:
+            client (openai.OpenAI): Client used to send the batched requests
+            window (float): Time in seconds to wait for more requests before a batch is send
+            max_batch_size (int): Maximum number of prompts in one batch. Full batches are send immediately.
+            model (str): Model name passed to the API
+        """
+
+        self._client = client
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._model = model
+
+        self._lock = threading.Lock()
+        self._pending: dict[GenerationConfig, list[tuple[str, Future]]] = {}
+
+    def submit(self, prompt: str, config: GenerationConfig) -> Future:
+        """Add a prompt to the next batch with matching generation parameters
+
+        Returns:
+            future (Future[str]): Resolves to the completion of the prompt
+        """
+
+        future = Future()
+
+        with self._lock:
+            pending = self._pending.get(config, None)
+
+            if pending is None:
+                pending = []
+                self._pending[config] = pending
+
+                timer = threading.Timer(self._window, self._flush, args=(config, pending))
+                timer.daemon = True
+                timer.start()
+
+            pending.append((prompt, future))
+            full = len(pending) >= self._max_batch_size
+
+            if full:
+                self._pending.pop(config)
+
+        if full:
+            threading.Thread(target=self._send, args=(config, pending), daemon=True).start()
+
+        return future
+
+    def _flush(self, config: GenerationConfig, pending: list[tuple[str, Future]]):
+        """Send the batch if it wasn't already send because it was full"""
+
+        with self._lock:
+            if self._pending.get(config, None) is not pending:
+                return
+
+            self._pending.pop(config)
+
+        self._send(config, pending)
+
+    def _send(self, config: GenerationConfig, requests: list[tuple[str, Future]]):
+        prompts = [prompt for prompt, _ in requests]
+
+        try:
+            # Single prompts are send as string for backends without support for prompt lists
+            res = self._client.completions.create(
+                prompt=prompts if len(prompts) > 1 else prompts[0], model=self._model, **config.to_dict()
+            )
+            texts = {choice.index: choice.text for choice in res.choices}
+
+            if any(i not in texts for i in range(len(prompts))):
+                raise ValueError(f"Expected {len(prompts)} choices but received {len(texts)}")
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+
+        for i, (_, future) in enumerate(requests):
+            future.set_result(texts[i])
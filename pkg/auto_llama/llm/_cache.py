@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, Generator
+
+from auto_llama import Chat, GenerationConfig, LLMInterface
+
+
+class PromptCache:
+    """Prompt-response cache with a bounded in-memory LRU and an optional sqlite tier on disk"""
+
+    def __init__(self, max_size: int = 1024, path: str = None, ttl: float = None) -> None:
+        """
+        Args:
+            max_size (int): Maximum number of responses kept in memory
+            path (str): Path of the sqlite database. If not given, responses are only cached in memory.
+            ttl (float): Time in seconds after which a cached response expires. Defaults to None (never)
+        """
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, created REAL)")
+            self._db.commit()
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Create a cache key from json serializable parts"""
+
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return self._ttl is not None and time.time() - created > self._ttl
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response or None"""
+
+        with self._lock:
+            entry = self._memory.get(key, None)
+
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._memory.move_to_end(key)
+                    return entry[0]
+
+                self._memory.pop(key)
+
+            if self._db is None:
+                return None
+
+            row = self._db.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                return None
+
+            if self._expired(row[1]):
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def set(self, key: str, value: str):
+        """Add a response to the cache"""
+
+        created = time.time()
+
+        with self._lock:
+            self._remember(key, value, created)
+
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, value, created))
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, created: float):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+
+        if len(self._memory) > self._max_size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove all responses from the cache"""
+
+        with self._lock:
+            self._memory.clear()
+
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+
+class CachedLLM(LLMInterface):
+    """Cache completions of another LLM
+
+    Responses are only cached if sampling of the wrapped LLM is deterministic (temperature 0 or a fixed seed in its
+    `generation_config`). Otherwise all calls are passed through. Chat methods are always passed through.
+    """
+
+    def __init__(self, llm: LLMInterface, max_size: int = 1024, path: str = None, ttl: float = None) -> None:
+        """
+        Args:
+            llm (LLMInterface): LLM whose completions should be cached
+            max_size (int): Maximum number of responses kept in memory
+            path (str): Path of a sqlite database for caching responses on disk. Defaults to None (memory only)
+            ttl (float): Time in seconds after which a cached response expires. Defaults to None (never)
+        """
+
+        self.llm = llm
+        self.cache = PromptCache(max_size, path, ttl)
+
+    def _sampling(self) -> tuple[float | None, int | None]:
+        """Temperature and seed of the wrapped LLM"""
+
+        config: GenerationConfig = getattr(self.llm, "generation_config", None)
+
+        if config is None:
+            return None, None
+
+        return config.temperature, config.seed
+
+    def _key(self, prompt: str, stopping_strings: list[str], max_new_tokens: int) -> str | None:
+        """Cache key of the request or None if sampling is not deterministic"""
+
+        temperature, seed = self._sampling()
+
+        if temperature != 0 and seed is None:
+            return None
+
+        return self.cache.key(prompt, list(stopping_strings), max_new_tokens, temperature, seed)
+
+    def completion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
+        key = self._key(prompt, stopping_strings, max_new_tokens)
+        res = self.cache.get(key) if key else None
+
+        if res is None:
+            res = self.llm.completion(prompt, stopping_strings, max_new_tokens)
+
+            if key:
+                self.cache.set(key, res)
+
+        return res
+
+    def completion_stream(
+        self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> Generator[str, None, None]:
+        key = self._key(prompt, stopping_strings, max_new_tokens)
+        res = self.cache.get(key) if key else None
+
+        if res is not None:
+            yield res
+            return
+
+        stream = self.llm.completion_stream(prompt, stopping_strings, max_new_tokens)
+        chunks = []
+
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            stream.close()
+
+        # Only reached if the stream was consumed completely
+        if key:
+            self.cache.set(key, "".join(chunks))
+
+    def chat(self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None) -> Chat:
+        return self.llm.chat(chat, stopping_strings, max_new_tokens)
+
+    def chat_stream(
+        self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> Generator[str, None, None]:
+        return self.llm.chat_stream(chat, stopping_strings, max_new_tokens)
+
+    async def acompletion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
+        key = self._key(prompt, stopping_strings, max_new_tokens)
+        res = self.cache.get(key) if key else None
+
+        if res is None:
+            res = await self.llm.acompletion(prompt, stopping_strings, max_new_tokens)
+
+            if key:
+                self.cache.set(key, res)
+
+        return res
+
+    async def acompletion_stream(
+        self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        key = self._key(prompt, stopping_strings, max_new_tokens)
+        res = self.cache.get(key) if key else None
+
+        if res is not None:
+            yield res
+            return
+
+        stream = self.llm.acompletion_stream(prompt, stopping_strings, max_new_tokens)
+        chunks = []
+
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            await stream.aclose()
+
+        if key:
+            self.cache.set(key, "".join(chunks))
+
+    async def achat(self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None) -> Chat:
+        return await self.llm.achat(chat, stopping_strings, max_new_tokens)
+
+    def achat_stream(
+        self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        return self.llm.achat_stream(chat, stopping_strings, max_new_tokens)
@@ -0,0 +1,245 @@
+import asyncio
+import time
+from typing import AsyncGenerator, Generator
+
+from auto_llama import Chat, LLMInterface, TokenCounter, approx_token_count
+from auto_llama._metrics import MetricsSink, metrics
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+_INTER_TOKEN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0)
+_THROUGHPUT_BUCKETS = (1, 2.5, 5, 10, 15, 20, 30, 40, 50, 75, 100, 150, 250, 500)
+_TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+LLM_METRICS = {
+    "auto_llama_llm_request_seconds": ("Duration of completed LLM calls", _LATENCY_BUCKETS),
+    "auto_llama_llm_time_to_first_token_seconds": ("Time until the first streamed chunk", _LATENCY_BUCKETS),
+    "auto_llama_llm_inter_token_seconds": ("Time between two streamed chunks", _INTER_TOKEN_BUCKETS),
+    "auto_llama_llm_tokens_per_second": ("Generated tokens per second", _THROUGHPUT_BUCKETS),
+    "auto_llama_llm_prompt_tokens": ("Number of prompt tokens", _TOKEN_BUCKETS),
+    "auto_llama_llm_completion_tokens": ("Number of generated tokens", _TOKEN_BUCKETS),
+}
+"""Histograms recorded by `InstrumentedLLM` (name -> (description, buckets))"""
+
+
+class _Measurement:
+    """Timings of a single LLM call"""
+
+    def __init__(self, llm: "InstrumentedLLM", method: str, prompt: str) -> None:
+        self._llm = llm
+        self._labels = {"method": method}
+        self._start = time.perf_counter()
+        self._first = None
+        self._last = None
+
+        self._observe("auto_llama_llm_prompt_tokens", llm._token_counter(prompt))
+
+    def _observe(self, name: str, value: float):
+        for sink in self._llm._sinks:
+            sink.observe(name, value, self._labels)
+
+    def _increment(self, name: str):
+        for sink in self._llm._sinks:
+            sink.increment(name, 1, self._labels)
+
+    def chunk(self):
+        """Record the arrival of a streamed chunk"""
+
+        now = time.perf_counter()
+
+        if self._first is None:
+            self._first = now
+            self._observe("auto_llama_llm_time_to_first_token_seconds", now - self._start)
+        else:
+            self._observe("auto_llama_llm_inter_token_seconds", now - self._last)
+
+        self._last = now
+
+    def done(self, output: str):
+        """Record a completed call"""
+
+        end = time.perf_counter()
+        tokens = self._llm._token_counter(output)
+
+        # Throughput of the decoding phase if the response was streamed, otherwise of the whole call
+        start = self._first if self._first is not None and self._last > self._first else self._start
+
+        self._observe("auto_llama_llm_request_seconds", end - self._start)
+        self._observe("auto_llama_llm_completion_tokens", tokens)
+
+        if end > start:
+            self._observe("auto_llama_llm_tokens_per_second", tokens / (end - start))
+
+    def cancelled(self):
+        """Record a call which was aborted by the caller (e.g. a closed stream)"""
+
+        self._increment("auto_llama_llm_cancelled_total")
+
+    def failed(self):
+        """Record a call which raised an exception"""
+
+        self._increment("auto_llama_llm_errors_total")
+
+
+class InstrumentedLLM(LLMInterface):
+    """Record latency and throughput metrics of another LLM
+
+    Records the request duration, time to first token, inter-token latency, tokens per second, prompt and
+    completion size (see `LLM_METRICS`) as histograms labeled by method, as well as cancelled and failed calls as
+    counters. Every streamed chunk is treated as one token for latency measurements, token counts are computed
+    with the `token_counter`.
+    """
+
+    def __init__(
+        self,
+        llm: LLMInterface,
+        sinks: list[MetricsSink] = None,
+        token_counter: TokenCounter = approx_token_count,
+    ) -> None:
+        """
+        Args:
+            llm (LLMInterface): LLM which should be instrumented
+            sinks (list[MetricsSink]): Receivers of the metrics. Defaults to the global registry `metrics`
+            token_counter (TokenCounter): Callback for counting tokens. Defaults to a fast approximation.
+        """
+
+        self.llm = llm
+        self._sinks = sinks if sinks is not None else [metrics]
+        self._token_counter = token_counter
+
+        for sink in self._sinks:
+            for name, (help, buckets) in LLM_METRICS.items():
+                sink.describe(name, help, buckets)
+
+    @property
+    def generation_config(self):
+        """Generation config of the wrapped LLM (None if it has none), e.g. for caching with `CachedLLM`"""
+
+        return getattr(self.llm, "generation_config", None)
+
+    def completion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
+        measurement = _Measurement(self, "completion", prompt)
+
+        try:
+            res = self.llm.completion(prompt, stopping_strings, max_new_tokens)
+        except Exception:
+            measurement.failed()
+            raise
+
+        measurement.done(res)
+        return res
+
+    def completion_stream(
+        self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> Generator[str, None, None]:
+        stream = self.llm.completion_stream(prompt, stopping_strings, max_new_tokens)
+        return self._stream(_Measurement(self, "completion_stream", prompt), stream)
+
+    def chat(self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None) -> Chat:
+        measurement = _Measurement(self, "chat", chat.prompt)
+
+        try:
+            chat = self.llm.chat(chat, stopping_strings, max_new_tokens)
+        except Exception:
+            measurement.failed()
+            raise
+
+        measurement.done(chat.last.message)
+        return chat
+
+    def chat_stream(
+        self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> Generator[str, None, None]:
+        measurement = _Measurement(self, "chat_stream", chat.prompt)
+        return self._stream(measurement, self.llm.chat_stream(chat, stopping_strings, max_new_tokens))
+
+    async def acompletion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
+        measurement = _Measurement(self, "acompletion", prompt)
+
+        try:
+            res = await self.llm.acompletion(prompt, stopping_strings, max_new_tokens)
+        except asyncio.CancelledError:
+            measurement.cancelled()
+            raise
+        except Exception:
+            measurement.failed()
+            raise
+
+        measurement.done(res)
+        return res
+
+    def acompletion_stream(
+        self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        stream = self.llm.acompletion_stream(prompt, stopping_strings, max_new_tokens)
+        return self._astream(_Measurement(self, "acompletion_stream", prompt), stream)
+
+    async def achat(self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None) -> Chat:
+        measurement = _Measurement(self, "achat", chat.prompt)
+
+        try:
+            chat = await self.llm.achat(chat, stopping_strings, max_new_tokens)
+        except asyncio.CancelledError:
+            measurement.cancelled()
+            raise
+        except Exception:
+            measurement.failed()
+            raise
+
+        measurement.done(chat.last.message)
+        return chat
+
+    def achat_stream(
+        self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        measurement = _Measurement(self, "achat_stream", chat.prompt)
+        return self._astream(measurement, self.llm.achat_stream(chat, stopping_strings, max_new_tokens))
+
+    def _stream(self, measurement: _Measurement, stream: Generator[str, None, None]) -> Generator[str, None, None]:
+        chunks = []
+        status = "cancelled"
+
+        try:
+            for chunk in stream:
+                measurement.chunk()
+                chunks.append(chunk)
+                yield chunk
+
+            status = "done"
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            stream.close()
+
+            if status == "done":
+                measurement.done("".join(chunks))
+            elif status == "failed":
+                measurement.failed()
+            else:
+                # Closed by the caller before the stream was exhausted
+                measurement.cancelled()
+
+    async def _astream(self, measurement: _Measurement, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        chunks = []
+        status = "cancelled"
+
+        try:
+            async for chunk in stream:
+                measurement.chunk()
+                chunks.append(chunk)
+                yield chunk
+
+            status = "done"
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            await stream.aclose()
+
+            if status == "done":
+                measurement.done("".join(chunks))
+            elif status == "failed":
+                measurement.failed()
+            else:
+                # Closed by the caller before the stream was exhausted
+                measurement.cancelled()
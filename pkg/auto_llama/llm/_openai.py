@@ -1,10 +1,15 @@
-from typing import Generator
+import asyncio
+from typing import Any, AsyncGenerator, Generator
 
-from auto_llama import LLMInterface, Chat, exceptions
+from auto_llama import LLMInterface, Chat, GenerationConfig, exceptions
+
+from ._batching import CompletionBatcher
 
 HAS_DEPENDENCIES = True
 
 try:
+    import httpx
+    from openai import AsyncOpenAI as AsyncOpenAIClient
     from openai import OpenAI as OpenAIClient
 except ImportError:
     HAS_DEPENDENCIES = False
@@ -19,34 +24,93 @@ class LocalOpenAILLM(LLMInterface):
         stopping_strings: list[str] = None,
         temperature: float = None,
         max_new_tokens: int = 200,
+        seed: int = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        batch_window: float = None,
+        max_batch_size: int = 32,
     ) -> None:
+        """
+        Args:
+            base_url (str): Base URL of the OpenAI compatible API
+            stopping_strings (list[str]): Default stopping strings
+            temperature (float): Sampling temperature
+            max_new_tokens (int): Default maximum number of generated tokens
+            seed (int): Fixed sampling seed (makes sampling deterministic, if supported by the backend)
+            max_connections (int): Maximum number of concurrent connections of the async client
+            max_keepalive_connections (int): Number of idle connections the async client keeps open for reuse
+            batch_window (float): If set, (non streaming) completions which arrive within this time (in seconds) and
+                share the same parameters are send as one batched request. Defaults to None (no batching).
+            max_batch_size (int): Maximum number of prompts in one batched request
+        """
+
         if not HAS_DEPENDENCIES:
             raise exceptions.LLMDependenciesMissing(self.__class__.__name__, "openai")
 
-        self.config = {}
-        if stopping_strings:
-            self.config["stop"] = stopping_strings
-        if temperature:
-            self.config["temperature"] = temperature
-        if max_new_tokens:
-            self.config["max_tokens"] = max_new_tokens
+        self.generation_config = GenerationConfig(
+            stop=tuple(stopping_strings or ()),
+            max_tokens=max_new_tokens or 200,
+            temperature=temperature,
+            seed=seed,
+        )
 
+        self.base_url = base_url
         self.client = OpenAIClient(base_url=base_url, api_key="NONE")
 
+        self._limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_keepalive_connections
+        )
+        self._async_client: AsyncOpenAIClient = None
+
+        self._batcher = None
+        if batch_window:
+            self._batcher = CompletionBatcher(self.client, batch_window, max_batch_size)
+
+    @property
+    def async_client(self) -> "AsyncOpenAIClient":
+        """Async client shared by all async calls (created on first use)
+
+        Uses a pooled HTTP client, so connections to the LLM server are kept alive and reused between requests.
+        """
+
+        if self._async_client is None:
+            self._async_client = AsyncOpenAIClient(
+                base_url=self.base_url,
+                api_key="NONE",
+                http_client=httpx.AsyncClient(limits=self._limits, timeout=httpx.Timeout(600, connect=10)),
+            )
+
+        return self._async_client
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """Default generation parameters as keyword arguments for the OpenAI API"""
+
+        return self.generation_config.to_dict()
+
+    def _params(self, stopping_strings: list[str], max_new_tokens: int) -> GenerationConfig:
+        """Generation parameters of a single call"""
+
+        return self.generation_config.merge(stopping_strings, max_new_tokens)
+
+    def _chat_history(self, chat: Chat) -> list[dict[str, str]]:
+        return [{"role": chat_msg.role, "content": chat_msg.message} for chat_msg in chat.history]
+
     def completion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
-        self.config["stop"] = [*stopping_strings, *self.config.get("stop", [])]
-        self.config["max_tokens"] = max_new_tokens or self.config.get("max_tokens", 200)
+        params = self._params(stopping_strings, max_new_tokens)
+
+        if self._batcher:
+            return self._batcher.submit(prompt, params).result()
 
-        res = self.client.completions.create(prompt=prompt, model="NONE", **self.config)
+        res = self.client.completions.create(prompt=prompt, model="NONE", **params.to_dict())
         return res.choices[0].text
 
     def completion_stream(
-        self, prompt: str, stopping_strings: list[str] = ..., max_new_tokens: int = None
+        self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None
     ) -> Generator[str, None, None]:
-        self.config["stop"] = [*stopping_strings, *self.config.get("stop", [])]
-        self.config["max_tokens"] = max_new_tokens or self.config.get("max_tokens", 200)
+        params = self._params(stopping_strings, max_new_tokens)
 
-        res = self.client.completions.create(prompt=prompt, model="NONE", stream=True, **self.config)
+        res = self.client.completions.create(prompt=prompt, model="NONE", stream=True, **params.to_dict())
 
         try:
             for chunk in res:
@@ -55,26 +119,71 @@ class LocalOpenAILLM(LLMInterface):
             res.response.close()
 
     def chat(self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None) -> Chat:
-        self.config["stop"] = [*stopping_strings, *self.config.get("stop", [])]
-        self.config["max_tokens"] = max_new_tokens or self.config.get("max_tokens", 200)
+        params = self._params(stopping_strings, max_new_tokens)
 
-        opain_chat_history = [{"role": chat_msg.role, "content": chat_msg.message} for chat_msg in chat.history]
-        res = self.client.chat.completions.create(messages=opain_chat_history, model="NONE", **self.config)
+        res = self.client.chat.completions.create(messages=self._chat_history(chat), model="NONE", **params.to_dict())
 
         chat.append("assistant", res.choices[0].message.content)
         return chat
 
     def chat_stream(
-        self, chat: Chat, stopping_strings: list[str] = ..., max_new_tokens: int = None
+        self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None
     ) -> Generator[str, None, None]:
-        self.config["stop"] = [*stopping_strings, *self.config.get("stop", [])]
-        self.config["max_tokens"] = max_new_tokens or self.config.get("max_tokens", 200)
+        params = self._params(stopping_strings, max_new_tokens)
 
-        opain_chat_history = [{"role": chat_msg.role, "content": chat_msg.message} for chat_msg in chat.history]
-        res = self.client.chat.completions.create(messages=opain_chat_history, model="NONE", stream=True, **self.config)
+        res = self.client.chat.completions.create(
+            messages=self._chat_history(chat), model="NONE", stream=True, **params.to_dict()
+        )
 
         try:
             for chunk in res:
                 yield chunk.choices[0].delta.content or ""
         finally:
             res.response.close()
+
+    async def acompletion(self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None) -> str:
+        params = self._params(stopping_strings, max_new_tokens)
+
+        if self._batcher:
+            return await asyncio.wrap_future(self._batcher.submit(prompt, params))
+
+        res = await self.async_client.completions.create(prompt=prompt, model="NONE", **params.to_dict())
+        return res.choices[0].text
+
+    async def acompletion_stream(
+        self, prompt: str, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        params = self._params(stopping_strings, max_new_tokens)
+
+        res = await self.async_client.completions.create(prompt=prompt, model="NONE", stream=True, **params.to_dict())
+
+        try:
+            async for chunk in res:
+                yield chunk.choices[0].text or ""
+        finally:
+            await res.response.aclose()
+
+    async def achat(self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None) -> Chat:
+        params = self._params(stopping_strings, max_new_tokens)
+
+        res = await self.async_client.chat.completions.create(
+            messages=self._chat_history(chat), model="NONE", **params.to_dict()
+        )
+
+        chat.append("assistant", res.choices[0].message.content)
+        return chat
+
+    async def achat_stream(
+        self, chat: Chat, stopping_strings: list[str] = [], max_new_tokens: int = None
+    ) -> AsyncGenerator[str, None]:
+        params = self._params(stopping_strings, max_new_tokens)
+
+        res = await self.async_client.chat.completions.create(
+            messages=self._chat_history(chat), model="NONE", stream=True, **params.to_dict()
+        )
+
+        try:
+            async for chunk in res:
+                yield chunk.choices[0].delta.content or ""
+        finally:
+            await res.response.aclose()
@@ -14,8 +14,11 @@ from ._util import (
     num_to_char_long,
     num_to_word,
 )
+from ._lemmatizer import Lemmatizer, lemmatizer
+from ._pipeline import TextPipeline
 from ._loader import TextLoader, WebTextLoader, RedditLoader, PDFLoader, PlainTextLoader, FileLike, FileLoader
 from ._chunking import TextChunker, ChunkMerger
+from ._docs import DocCache, doc_cache
 from ._summarizing import Summarizer
 
 # Register LLM Models
@@ -1,28 +1,84 @@
+from collections import deque
+from itertools import islice
+from typing import Iterator
+
 import numpy as np
 
-from auto_llama import exceptions, ModelLoader
+from auto_llama import TokenCounter, approx_token_count, exceptions
 
+from ._docs import DocCache, doc_cache, parse
+from ._matching import contained, overlap
 
 HAS_DEPENDENCIES = True
 
 try:
-    from spacy.language import Language
+    from spacy.tokens import Doc
 except ImportError:
     #    raise exceptions.ExtrasDependenciesMissing("nlp", "nlp")
     HAS_DEPENDENCIES = False
 
 
 class TextChunker:
-    """Helps to split text into sentences or groups of related sentences"""
+    """Helps to split text into sentences or groups of related sentences
+
+    Only sentence boundaries and word vectors are needed, so the other components of the spaCy pipeline are
+    disabled. Use `TextChunker.batch` to process many texts at once.
+    """
+
+    DISABLED_COMPONENTS = ("tagger", "attribute_ruler", "lemmatizer", "ner")
+    """spaCy components which aren't needed for chunking"""
+
+    def __init__(self, text: str, sentencizer: bool = False) -> None:
+        """
+        Args:
+            text (str): Text which should be split
+            sentencizer (bool): Split sentences with rules instead of the dependency parser. Defaults to False.
+        """
 
-    def __init__(self, text: str) -> None:
         if not HAS_DEPENDENCIES:
             raise exceptions.ExtrasDependenciesMissing(self.__class__.__name__, "text")
 
         self._text = text
+        self._doc = parse([text], self.DISABLED_COMPONENTS, sentencizer)[0]
+
+    @classmethod
+    def from_doc(cls, doc: "Doc") -> "TextChunker":
+        """Create a chunker from an already processed spaCy document"""
 
-        nlp = ModelLoader.get("spacy", Language)
-        self._doc = nlp(self._text)
+        if not HAS_DEPENDENCIES:
+            raise exceptions.ExtrasDependenciesMissing(cls.__name__, "text")
+
+        instance = cls.__new__(cls)
+        instance._text = doc.text
+        instance._doc = doc
+
+        return instance
+
+    @classmethod
+    def batch(
+        cls,
+        texts: list[str],
+        n_process: int = 1,
+        batch_size: int = 64,
+        sentencizer: bool = False,
+        cache: DocCache | None = doc_cache,
+    ) -> list["TextChunker"]:
+        """Create chunkers for multiple texts, processed in batches (and optionally in parallel) by spaCy
+
+        Args:
+            texts (list[str]): Texts which should be split
+            n_process (int): Number of processes. Defaults to 1 (-1 uses all cores)
+            batch_size (int): Number of texts per batch. Defaults to 64.
+            sentencizer (bool): Split sentences with rules instead of the dependency parser. Defaults to False.
+            cache (DocCache): Cache for processed documents. Defaults to the shared `doc_cache` (None disables it)
+        """
+
+        if not HAS_DEPENDENCIES:
+            raise exceptions.ExtrasDependenciesMissing(cls.__name__, "text")
+
+        docs = parse(texts, cls.DISABLED_COMPONENTS, sentencizer, n_process, batch_size, cache)
+
+        return [cls.from_doc(doc) for doc in docs]
 
     def sentences(self) -> list[str]:
         """Splits the text into sentences."""
@@ -30,21 +86,128 @@ class TextChunker:
         sentences = [sent.text for sent in self._doc.sents]
         return sentences
 
-    def paragraphs(self, threshold: float = 0.5, seperator: str = " "):
+    def paragraphs(self, threshold: float = 0.5, seperator: str = " ") -> list[str]:
         """Splits the text into paragraphs, with optional overlap between them."""
 
-        sents = [sent for sent in self._doc.sents]
-        vecs = np.stack([sent.vector / sent.vector_norm for sent in sents])
-        paragraphs: list[str] = [sents[0].text]
+        return list(self.iter_paragraphs(threshold, seperator))
 
-        for i, sent in enumerate(sents[1:], start=1):
-            if np.dot(vecs[i], vecs[i - 1]) < threshold:
-                paragraphs.append("")
-                paragraphs[-1] += sent.text
-            else:
-                paragraphs[-1] += seperator + sent.text
+    def iter_paragraphs(self, threshold: float = 0.5, seperator: str = " ", block_size: int = 1024) -> Iterator[str]:
+        """Splits the text into paragraphs and yields every paragraph as soon as it is complete
+
+        A new paragraph starts where the cosine similarity of two adjacent sentences is below the `threshold`. The
+        similarities are computed for blocks of `block_size` sentences at once.
+        """
+
+        sents = iter(self._doc.sents)
+        paragraph: list[str] = []
+        last = None
+
+        while block := list(islice(sents, block_size)):
+            vecs = np.stack([sent.vector for sent in block])
+
+            # Sentences without vectors have no similarity (nan) and never start a new paragraph
+            with np.errstate(divide="ignore", invalid="ignore"):
+                vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+                prev = np.vstack([vecs[:1] if last is None else last, vecs[:-1]])
+                splits = np.einsum("ij,ij->i", vecs, prev) < threshold
+
+            if last is None:
+                splits[0] = False
+
+            last = vecs[-1:]
+
+            for sent, split in zip(block, splits.tolist()):
+                if split:
+                    yield seperator.join(paragraph)
+                    paragraph = []
+
+                paragraph.append(sent.text)
+
+        if paragraph:
+            yield seperator.join(paragraph)
+
+    def windows(
+        self,
+        max_tokens: int = 256,
+        overlap: int = 32,
+        token_counter: TokenCounter = approx_token_count,
+        seperator: str = " ",
+    ) -> list[str]:
+        """Packs consecutive sentences into windows of a maximum number of tokens (see `iter_windows`)"""
+
+        return list(self.iter_windows(max_tokens, overlap, token_counter, seperator))
 
-        return paragraphs
+    def iter_windows(
+        self,
+        max_tokens: int = 256,
+        overlap: int = 32,
+        token_counter: TokenCounter = approx_token_count,
+        seperator: str = " ",
+    ) -> Iterator[str]:
+        """Packs consecutive sentences into windows of a maximum number of tokens, e.g. the maximum sequence length
+        of an embedding model, and yields every window as soon as it is complete
+
+        Consecutive windows share the trailing sentences of the previous window (up to `overlap` tokens), so
+        information at the border of two windows isn't lost. Sentences longer than `max_tokens` are split at
+        whitespace. The window size is the sum of the token counts of its sentences.
+
+        Args:
+            max_tokens (int): Maximum number of tokens per window. Defaults to 256.
+            overlap (int): Maximum number of tokens shared with the previous window. Defaults to 32.
+            token_counter (TokenCounter): Callback for counting tokens, ideally the tokenizer of the embedding
+                model. Defaults to a fast approximation.
+            seperator (str): Inserted between sentences. Defaults to " ".
+        """
+
+        if not 0 <= overlap < max_tokens:
+            raise ValueError("`overlap` has to be positive and smaller than `max_tokens`")
+
+        window: deque[tuple[str, int]] = deque()
+        tokens = 0
+
+        for sent in self._doc.sents:
+            for text, count in _fit(sent.text.strip(), max_tokens, token_counter):
+                if window and tokens + count > max_tokens:
+                    yield seperator.join(text for text, _ in window)
+
+                    # Keep the trailing sentences as overlap (as many as fit next to the new sentence)
+                    while window and (tokens > overlap or tokens + count > max_tokens):
+                        tokens -= window.popleft()[1]
+
+                window.append((text, count))
+                tokens += count
+
+        if window:
+            yield seperator.join(text for text, _ in window)
+
+
+def _fit(sentence: str, max_tokens: int, token_counter: TokenCounter) -> Iterator[tuple[str, int]]:
+    """Split a sentence at whitespace into parts with at most `max_tokens` tokens"""
+
+    if not sentence:
+        return
+
+    count = token_counter(sentence)
+
+    if count <= max_tokens:
+        yield sentence, count
+        return
+
+    words: list[str] = []
+    tokens = 0
+
+    for word in sentence.split():
+        word_count = token_counter(word)
+
+        if words and tokens + word_count > max_tokens:
+            yield " ".join(words), tokens
+            words, tokens = [], 0
+
+        words.append(word)
+        tokens += word_count
+
+    if words:
+        yield " ".join(words), tokens
 
 
 class ChunkMerger:
@@ -56,21 +219,35 @@ class ChunkMerger:
 
         self._chunks = chunks
 
-    def merge(self, seperator: str = " "):
-        result = ""
-        valid_idx = set(range(len(self._chunks)))
+    def merge(self, seperator: str = " ", stitch: bool = False, min_overlap: int = 16) -> str:
+        """Merge the chunks in their order, skipping chunks which are already included in another chunk
+
+        Args:
+            seperator (str): Inserted between chunks. Defaults to " ".
+            stitch (bool): Join adjacent chunks which overlap (end and start with the same text) without repeating
+                the overlap. Defaults to False.
+            min_overlap (int): Minimum number of overlapping characters for stitching. Defaults to 16.
+        """
+
+        is_contained = contained(self._chunks)
+        last = {chunk: i for i, chunk in enumerate(self._chunks)}
+        parts: list[str] = []
+        prev = None
 
         for i, chunk in enumerate(self._chunks):
-            valid = True
+            # Chunk is already included in another chunk (or repeated later) -> chunk is invalid
+            if is_contained[i] or last[chunk] != i:
+                continue
 
-            for other_chunk in (other for j, other in enumerate(self._chunks) if j != i and j in valid_idx):
-                if chunk in other_chunk:
-                    # Chunk is already included in other chunk -> chunk is invalid
-                    valid = False
-                    valid_idx.remove(i)
-                    break
+            length = overlap(prev, chunk) if stitch and prev is not None else 0
+
+            if length >= min_overlap and length > 0:
+                parts.append(chunk[length:])
+            else:
+                if parts:
+                    parts.append(seperator)
+                parts.append(chunk)
 
-            if valid:
-                result += chunk + seperator
+            prev = chunk
 
-        return result.strip(seperator)
+        return "".join(parts).strip(seperator)
@@ -0,0 +1,293 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable
+
+import numpy as np
+
+from auto_llama import ModelHost, ModelLoader, RemoteModel
+
+HAS_DEPENDENCIES = True
+
+try:
+    import spacy
+    import srsly
+    from spacy.language import Language
+    from spacy.pipeline import Sentencizer
+    from spacy.tokens import Doc
+    from spacy.vocab import Vocab
+except ImportError:
+    HAS_DEPENDENCIES = False
+
+_sentencizer: "Sentencizer | None" = None
+_local_vocab: "Vocab | None" = None
+
+
+def _vocab() -> "Vocab":
+    """Vocab of the spaCy model, or a blank English vocab if the model is used from a `ModelHost` (documents from
+    the host carry their word vectors as tensor, see `_doc_to_bytes`)"""
+
+    global _local_vocab
+
+    nlp = ModelLoader.get("spacy", Language)
+
+    if not isinstance(nlp, RemoteModel):
+        return nlp.vocab
+
+    if _local_vocab is None:
+        _local_vocab = spacy.blank("en").vocab
+
+    return _local_vocab
+
+
+def _doc_to_bytes(doc: "Doc") -> bytes:
+    """Serialize a document without its vocab, but with its word vectors as tensor
+
+    The vocab of a hosted model is replaced by a blank vocab without vectors, for which spaCy computes
+    `Token/Span/Doc.vector` from the tensor. With the vocab of the model, the vectors of the vocab are used.
+    """
+
+    if doc.vocab.vectors.size:
+        tensor = np.array([token.vector for token in doc], dtype="float32").reshape(len(doc), -1)
+    else:
+        tensor = doc.tensor
+
+    return srsly.msgpack_dumps({"doc": doc.to_bytes(exclude=["vocab", "tensor"]), "tensor": tensor})
+
+
+def _doc_from_bytes(data: bytes) -> "Doc":
+    msg = srsly.msgpack_loads(data)
+
+    doc = Doc(_vocab()).from_bytes(msg["doc"], exclude=["tensor"])
+    doc.tensor = msg["tensor"]
+
+    return doc
+
+
+if HAS_DEPENDENCIES:
+    # Pickling a document includes the whole vocab of the model
+    ModelHost.register_codec(Doc, _doc_to_bytes, _doc_from_bytes)
+
+
+class DocCache:
+    """Cache of processed spaCy documents, keyed on a hash of the text content
+
+    A document can be reused for every request which doesn't need more pipeline components than it was processed
+    with (e.g. a document processed for the `Summarizer` also serves the `TextChunker`). Documents processed with
+    rule-based sentence splitting are only reused for the same kind of splitting.
+
+    The least recently used documents are dropped when the cache is full. With a path, documents are also stored
+    on disk (with their word vectors, in one directory per text), so they survive restarts.
+
+    Only identical texts hit the cache, e.g. a document which is summarized again or a summary which is chunked
+    (see `Summarizer.summarize`). Texts are cached before any preprocessing.
+    """
+
+    def __init__(self, max_docs: int = 128, path: str = None) -> None:
+        """
+        Args:
+            max_docs (int): Maximum number of documents kept in memory. Defaults to 128 (0 keeps them only on disk)
+            path (str): Directory for storing documents on disk. Defaults to None (memory only)
+        """
+
+        self._docs: OrderedDict[str, list[tuple[frozenset[str], bool, "Doc"]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        self.configure(max_docs, path)
+
+    def configure(self, max_docs: int = 128, path: str = None) -> "DocCache":
+        """Change the size of the cache and the directory for storing documents on disk (see `__init__`)"""
+
+        self.max_docs = max_docs
+        self.path = path
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+        with self._lock:
+            self._shrink()
+
+        return self
+
+    @property
+    def enabled(self) -> bool:
+        """True if documents are kept in memory or on disk"""
+
+        return self.max_docs > 0 or self.path is not None
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Content hash of a text"""
+
+        return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get(self, key: str, disable: Iterable[str] = (), sentencizer: bool = False) -> "Doc | None":
+        """Get a document which was processed without more than the `disable`d components"""
+
+        disable = frozenset(disable)
+
+        with self._lock:
+            for disabled, rules, doc in self._docs.get(key, ()):
+                if disabled <= disable and rules == sentencizer:
+                    self._docs.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return doc
+
+        doc = self._load(key, disable, sentencizer)
+
+        with self._lock:
+            self._stats["hits" if doc is not None else "misses"] += 1
+
+        if doc is not None:
+            self._remember(key, disable, sentencizer, doc)
+
+        return doc
+
+    def put(self, key: str, doc: "Doc", disable: Iterable[str] = (), sentencizer: bool = False):
+        """Add a document, processed with the `disable`d components turned off"""
+
+        disable = frozenset(disable)
+        self._remember(key, disable, sentencizer, doc)
+
+        if self.path is not None:
+            os.makedirs(os.path.join(self.path, key), exist_ok=True)
+
+            with open(os.path.join(self.path, key, self._file_name(disable, sentencizer)), "wb") as file:
+                file.write(_doc_to_bytes(doc))
+
+    def clear(self):
+        """Remove all documents from memory (documents on disk are kept)"""
+
+        with self._lock:
+            self._docs.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Cache statistics: hits, misses and number of documents in memory"""
+
+        with self._lock:
+            return {**self._stats, "docs": len(self._docs)}
+
+    def _remember(self, key: str, disable: frozenset[str], sentencizer: bool, doc: "Doc"):
+        if self.max_docs <= 0:
+            return
+
+        with self._lock:
+            self._docs.setdefault(key, []).append((disable, sentencizer, doc))
+            self._docs.move_to_end(key)
+            self._shrink()
+
+    def _shrink(self):
+        while len(self._docs) > max(self.max_docs, 0):
+            self._docs.popitem(last=False)
+
+    def _file_name(self, disable: frozenset[str], sentencizer: bool) -> str:
+        return f"{'rules' if sentencizer else 'parser'}-{'+'.join(sorted(disable))}.doc"
+
+    def _load(self, key: str, disable: frozenset[str], sentencizer: bool) -> "Doc | None":
+        if self.path is None:
+            return None
+
+        directory = os.path.join(self.path, key)
+        prefix = f"{'rules' if sentencizer else 'parser'}-"
+
+        # Only the few variants of this text are listed (nothing for unknown texts)
+        try:
+            file_names = os.listdir(directory)
+        except FileNotFoundError:
+            return None
+
+        for file_name in file_names:
+            if not file_name.startswith(prefix) or not file_name.endswith(".doc"):
+                continue
+
+            disabled = file_name[len(prefix) : -len(".doc")]
+
+            if set(filter(None, disabled.split("+"))) <= disable:
+                with open(os.path.join(directory, file_name), "rb") as file:
+                    return _doc_from_bytes(file.read())
+
+        return None
+
+
+doc_cache = DocCache(max_docs=0)
+"""Cache of processed spaCy documents shared by `TextChunker` and `Summarizer`
+
+Disabled by default, enable it with `doc_cache.configure(max_docs, path)` where texts are parsed repeatedly. The
+`Summarizer` caches the document of its summary, so chunking the summary (e.g. when it is saved to a `TxtAIMemory`)
+doesn't parse it again.
+"""
+
+
+def parse(
+    texts: Iterable[str],
+    disable: Iterable[str] = (),
+    sentencizer: bool = False,
+    n_process: int = 1,
+    batch_size: int = 64,
+    cache: DocCache | None = doc_cache,
+) -> list["Doc"]:
+    """Process texts in batches with the shared spaCy model (`nlp.pipe`)
+
+    Args:
+        texts (Iterable[str]): Texts to process
+        disable (Iterable[str]): Pipeline components which aren't needed (unknown names are ignored)
+        sentencizer (bool): Split sentences with rules instead of the (much slower) dependency parser
+        n_process (int): Number of processes. Defaults to 1 (-1 uses all cores)
+        batch_size (int): Number of texts per batch. Defaults to 64.
+        cache (DocCache): Cache for processed documents. Defaults to the shared `doc_cache` (None disables it)
+    """
+
+    global _sentencizer
+
+    texts = list(texts)
+    disable = list(disable)
+
+    if cache is not None and not cache.enabled:
+        cache = None
+
+    if sentencizer:
+        disable.append("parser")
+
+        if _sentencizer is None:
+            _sentencizer = Sentencizer()
+
+    # Texts are only hashed for the cache, without it duplicates are found by the texts themselves
+    keys = [DocCache.key(text) for text in texts] if cache is not None else texts
+    docs = [cache.get(key, disable, sentencizer) if cache is not None else None for key in keys]
+
+    # Process every missing text only once, even if it occurs multiple times
+    missing: dict[str, int] = {}
+    for i, doc in enumerate(docs):
+        if doc is None:
+            missing.setdefault(keys[i], i)
+
+    if missing:
+        nlp = ModelLoader.get("spacy", Language)
+        pending = [texts[i] for i in missing.values()]
+        stream = nlp.pipe(pending, disable=disable, n_process=n_process, batch_size=batch_size)
+
+        for i, doc in zip(missing.values(), stream):
+            docs[i] = _sentencizer(doc) if sentencizer else doc
+
+            if cache is not None:
+                cache.put(keys[i], docs[i], disable, sentencizer)
+
+    return [doc if doc is not None else docs[missing[keys[i]]] for i, doc in enumerate(docs)]
+
+
+def cache_doc(doc: "Doc", disable: Iterable[str] = (), sentencizer: bool = False, cache: DocCache | None = doc_cache):
+    """Add a document which wasn't processed by `parse` (e.g. derived from another document) to the cache
+
+    Args:
+        doc (Doc): Document, cached for its text
+        disable (Iterable[str]): Pipeline components which were disabled for the document it is derived from
+        sentencizer (bool): The sentences were split with rules instead of the dependency parser
+        cache (DocCache): Cache for processed documents. Defaults to the shared `doc_cache`
+    """
+
+    if cache is None or not cache.enabled:
+        return
+
+    disable = list(disable) + (["parser"] if sentencizer else [])
+    cache.put(DocCache.key(doc.text), doc, disable, sentencizer)
@@ -0,0 +1,74 @@
+import re
+from functools import lru_cache
+from typing import Any
+
+from auto_llama import ModelLoader
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+class Lemmatizer:
+    """Reduce words to their base or dictionary forms with a bounded LRU cache keyed on the surface form
+
+    Tokens without word characters (whitespace, punctuation) are returned unchanged without a lookup. The model is
+    only requested from the `ModelLoader` for cache misses.
+
+    Example:
+        lemmatizer = Lemmatizer(cache_size=500_000)
+        lemmas = lemmatizer.batch(["cats", "were", "running"])
+        print(lemmatizer.stats()["hit_rate"])
+    """
+
+    def __init__(self, cache_size: int = 100_000, model: str = "lemmatizer") -> None:
+        """
+        Args:
+            cache_size (int): Maximum number of cached words. Defaults to 100000
+            model (str): Name of the lemmatizer in the `ModelLoader`. Defaults to "lemmatizer" (WordNet)
+        """
+
+        self.model = model
+        self._lookup = lru_cache(maxsize=cache_size)(self._lemmatize)
+
+    def lemmatize(self, word: str) -> str:
+        """Lemma of a single word"""
+
+        if not word or not _WORD_CHAR.search(word):
+            return word
+
+        return self._lookup(word)
+
+    def batch(self, words: list[str]) -> list[str]:
+        """Lemmas of multiple words (every distinct word is looked up once)"""
+
+        lemmas = {word: self.lemmatize(word) for word in dict.fromkeys(words)}
+
+        return [lemmas[word] for word in words]
+
+    def __call__(self, word: str) -> str:
+        return self.lemmatize(word)
+
+    def stats(self) -> dict[str, Any]:
+        """Cache statistics: hits, misses, hit rate, number of cached words and the cache size"""
+
+        info = self._lookup.cache_info()
+        total = info.hits + info.misses
+
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / total if total else 0.0,
+            "size": info.currsize,
+            "cache_size": info.maxsize,
+        }
+
+    def clear(self):
+        """Empty the cache and reset the statistics"""
+
+        self._lookup.cache_clear()
+
+    def _lemmatize(self, word: str) -> str:
+        return ModelLoader.get(self.model).lemmatize(word)
+
+
+lemmatizer = Lemmatizer()
+"""Shared lemmatizer used by `lemmatize` and `TextPipeline.lemmatize`"""
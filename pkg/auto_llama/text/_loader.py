@@ -1,7 +1,11 @@
+import asyncio
+import io
 import os
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import BinaryIO, TextIO
+from typing import BinaryIO, Iterator, TextIO
 from urllib.parse import urlparse
 
 from auto_llama import exceptions
@@ -16,11 +20,40 @@ try:
     import wikipedia
     from bs4 import BeautifulSoup
     from pypdf import PdfReader
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
 
     from ._util import merge_symbols
 except (ImportError, exceptions.ExtrasDependenciesMissing):
     HAS_DEPENDENCIES = False
 
+_session_lock = threading.Lock()
+_session: "tuple[int, requests.Session] | None" = None
+
+
+def http_session() -> "requests.Session":
+    """Shared HTTP session of the process (keep-alive connection pool, retries with backoff for failed requests)"""
+
+    global _session
+
+    with _session_lock:
+        # Connections can't be shared with forked processes
+        if _session is None or _session[0] != os.getpid():
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET", "HEAD"),
+            )
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = (os.getpid(), session)
+
+        return _session[1]
+
 
 @dataclass
 class FileLike:
@@ -45,21 +78,104 @@ class TextLoader(ABC):
     def is_valid(self, source: str) -> bool:
         """Check if the source is valid for this loader"""
 
-    def batch(self, sources: list[str]) -> list[Article]:
-        """Execute loader for multiple sources"""
+    max_workers: int = 1
+    """Default number of sources loaded concurrently by `batch` and `abatch`"""
+
+    def batch(
+        self, sources: list[str], max_workers: int = None, return_exceptions: bool = False
+    ) -> list[Article | Exception]:
+        """Execute loader for multiple sources (concurrently in threads if `max_workers` is larger than 1)
+
+        Args:
+            sources (list[str]): Sources to load
+            max_workers (int): Number of sources loaded at once. Defaults to `max_workers` of the loader
+            return_exceptions (bool): Return the exceptions of failed sources instead of raising the first one
+        """
+
+        def load(source: str) -> Article | Exception:
+            try:
+                return self(source)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
 
-        return [self(s) for s in sources]
+        max_workers = max_workers or self.max_workers
+
+        if max_workers <= 1 or len(sources) <= 1:
+            return [load(s) for s in sources]
+
+        with ThreadPoolExecutor(min(max_workers, len(sources)), thread_name_prefix="loader") as executor:
+            return list(executor.map(load, sources))
+
+    async def abatch(
+        self, sources: list[str], max_workers: int = None, return_exceptions: bool = False
+    ) -> list[Article | Exception]:
+        """Async version of `batch`. Sources are loaded in worker threads without blocking the event loop"""
+
+        semaphore = asyncio.Semaphore(max_workers or self.max_workers)
+
+        async def load(source: str) -> Article:
+            async with semaphore:
+                return await asyncio.to_thread(self, source)
+
+        return await asyncio.gather(*(load(s) for s in sources), return_exceptions=return_exceptions)
+
+    def stream(self, source: str) -> Iterator[Article]:
+        """Execute loader and yield the source in parts as soon as they are loaded (by default as a whole)"""
+
+        yield self(source)
 
 
 class WebTextLoader(TextLoader):
-    """Load text documents from the web"""
+    """Load text documents from the web
+
+    Pages are fetched with the shared `http_session` (connection pooling, retries with backoff). `batch` and
+    `abatch` fetch multiple pages concurrently, with at most `max_per_host` requests to the same host at once
+    (shared by all loaders with the same limit).
+    """
+
+    _host_limits: dict[tuple[str, int], threading.BoundedSemaphore] = {}
+    _host_lock = threading.Lock()
+
+    def __init__(
+        self, seperator: str = "\n", timeout: float = 10.0, max_workers: int = 8, max_per_host: int = 4
+    ) -> None:
+        """
+        Args:
+            seperator (str): Seperator between text elements of the page. Defaults to "\\n".
+            timeout (float): Timeout for connecting and for reading in seconds. Defaults to 10.
+            max_workers (int): Number of pages fetched at once by `batch` and `abatch`. Defaults to 8.
+            max_per_host (int): Number of concurrent requests to the same host. Defaults to 4.
+        """
 
-    def __init__(self, seperator: str = "\n") -> None:
         super().__init__()
         self._seperator = seperator
+        self._timeout = timeout
+        self._max_per_host = max_per_host
+        self.max_workers = max_workers
+
+    def _get(self, url: str) -> "requests.Response":
+        """Fetch a page (raises for error status codes)"""
+
+        host = urlparse(url).netloc
+
+        with self._host_lock:
+            key = (host, self._max_per_host)
+            limit = self._host_limits.get(key)
+
+            if limit is None:
+                limit = self._host_limits[key] = threading.BoundedSemaphore(self._max_per_host)
+
+        with limit:
+            response = http_session().get(url, timeout=self._timeout)
+
+        response.raise_for_status()
+
+        return response
 
     def __call__(self, source: str) -> Article:
-        page = requests.get(source)
+        page = self._get(source)
         soup = BeautifulSoup(page.content, "html.parser")
 
         title = soup.title.string if soup.title else "HTML Page"
@@ -122,7 +238,7 @@ class RedditLoader(WebTextLoader):
     """Load text documents from Reddit posts (Only works with links to a single reddit post)"""
 
     def __call__(self, source: str) -> Article:
-        page = requests.get(source)
+        page = self._get(source)
         soup = BeautifulSoup(page.content, "html.parser")
 
         # Get h1 with slot=title
@@ -181,27 +297,9 @@ class PDFLoader(FileLoader):
         * Names: Lopez-Ferreras, VGG-19, CIFAR-100
         """
 
-        lines = [line.rstrip() for line in text.split("\n")]
+        dehyphenator = _Dehyphenator()
 
-        # Find dashes
-        line_numbers = []
-        for line_no, line in enumerate(lines[:-1]):
-            if line.endswith("-"):
-                line_numbers.append(line_no)
-
-        # Replace
-        for line_no in line_numbers:
-            lines = self.dehyphenate(lines, line_no)
-
-        return "\n".join(lines)
-
-    def dehyphenate(self, lines: list[str], line_no: int) -> list[str]:
-        next_line = lines[line_no + 1]
-        word_suffix = next_line.split(" ")[0]
-
-        lines[line_no] = lines[line_no][:-1] + word_suffix
-        lines[line_no + 1] = lines[line_no + 1][len(word_suffix) :]
-        return lines
+        return dehyphenator.feed(text) + dehyphenator.flush()
 
     def replace_ligatures(self, text: str) -> str:
         for search, replace in self._ligatures_map.items():
@@ -210,33 +308,45 @@ class PDFLoader(FileLoader):
         return text
 
     def __call__(self, source) -> Article:
-        if isinstance(source, str):
-            reader = PdfReader(source)
-        else:
-            reader = PdfReader(source.stream)
-            source = source.name
+        title = self._title(source.name if isinstance(source, FileLike) else source)
+        content = "".join(page.text for page in self.stream(source))
 
-        title = ".".join(os.path.basename(source).split(".")[:-1])
+        return Article(content, title, source.name if isinstance(source, FileLike) else source)
 
-        parts: list[str] = []
-        content = ""
+    def stream(self, source, n_process: int = 1, pages_per_task: int = 4) -> Iterator[Article]:
+        """Extract the text page by page and yield an article per page as soon as the page is done
 
-        def visitor_body(text, cm, tm, font_dict, font_size):
-            y = cm[5]
-            if y > 50 and y < 720:
-                parts.append(text)
+        Every page ends with a line break. Hyphens at the end of lines are removed in a single pass, also across
+        page boundaries (a line hyphenated at the end of a page is part of the next page's article).
+        Joining the texts of all articles gives the whole document.
 
-        for page in reader.pages:
-            content += page.extract_text(visitor_text=visitor_body)
+        Args:
+            source (str | FileLike): Path or file like object of the PDF
+            n_process (int): Number of processes extracting pages in parallel. Defaults to 1 (in this process).
+                Has to be 1 in daemon processes, which can't start child processes.
+            pages_per_task (int): Number of pages extracted at once by a process. Defaults to 4.
+        """
 
-        # text = "".join(parts)
-        # text = self.remove_hyphens(text)
-        # text = self.replace_ligatures(text)
+        if isinstance(source, FileLike):
+            data: str | bytes = source.stream.read()
+            source = source.name
+        else:
+            data = source
 
-        content = self.remove_hyphens(content)
-        content = self.remove_hyphens(content)
+        title = self._title(source)
+        dehyphenator = _Dehyphenator()
+        page = None
 
-        return Article(content, title, source)
+        for page, text in enumerate(_extract_pages(data, n_process, pages_per_task)):
+            # Every page ends with a line break, so words hyphenated at the end of a page are joined as well
+            if text := dehyphenator.feed(text + "\n"):
+                yield Article(text, title, source, page=page)
+
+        if (text := dehyphenator.flush()) and page is not None:
+            yield Article(text, title, source, page=page)
+
+    def _title(self, source: str) -> str:
+        return ".".join(os.path.basename(source).split(".")[:-1])
 
     def is_valid(self, source) -> bool:
         if isinstance(source, str):
@@ -245,6 +355,99 @@ class PDFLoader(FileLoader):
         return isinstance(source, FileLike) and source.name.lower().endswith(".pdf")
 
 
+_worker_reader: "PdfReader | None" = None
+
+
+def _open_reader(data: str | bytes):
+    """Open the PDF once per worker process (the data is sent once instead of with every task)"""
+
+    global _worker_reader
+    _worker_reader = PdfReader(data if isinstance(data, str) else io.BytesIO(data))
+
+
+def _read_pages(start: int, stop: int) -> list[str]:
+    """Extract the text of a range of pages (runs in worker processes)"""
+
+    return [_worker_reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _extract_pages(data: str | bytes, n_process: int, pages_per_task: int) -> Iterator[str]:
+    """Extract the text of all pages in order, optionally in parallel"""
+
+    reader = PdfReader(data if isinstance(data, str) else io.BytesIO(data))
+
+    if n_process == 1:
+        for page in reader.pages:
+            yield page.extract_text()
+        return
+
+    count = len(reader.pages)
+
+    with ProcessPoolExecutor(
+        n_process if n_process > 0 else None, initializer=_open_reader, initargs=(data,)
+    ) as executor:
+        tasks = [
+            executor.submit(_read_pages, start, min(start + pages_per_task, count))
+            for start in range(0, count, pages_per_task)
+        ]
+
+        for task in tasks:
+            yield from task.result()
+
+
+class _Dehyphenator:
+    """Remove hyphens at the end of lines (see `PDFLoader.remove_hyphens`) from text arriving in parts
+
+    A line ending with a hyphen is joined with the first word of the next line. If that word ends with a hyphen
+    as well, the line is also joined with the first word of the line after it. All lines are stripped at the end.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._held: list[str] = []
+
+    def feed(self, text: str) -> str:
+        """Add text and return the part of the result which is complete"""
+
+        *lines, self._buffer = (self._buffer + text).split("\n")
+
+        return "".join(line + "\n" for line in self._lines(lines))
+
+    def flush(self) -> str:
+        """Return the rest of the result (the last line isn't followed by a line break)"""
+
+        res = "\n".join([*self._lines([self._buffer]), *self._held])
+        self._buffer = ""
+        self._held = []
+
+        return res
+
+    def _lines(self, lines: list[str]) -> Iterator[str]:
+        for line in lines:
+            line = line.rstrip()
+
+            # The first held line ends with a hyphen, the others are empty rests of the lines it was joined with
+            if self._held:
+                suffix = line.split(" ")[0]
+                line = line[len(suffix) :]
+                self._held[0] = (self._held[0][:-1] + suffix).rstrip()
+
+                if self._held[0].endswith("-"):
+                    if not line:
+                        self._held.append(line)
+                        continue
+
+                    self._held[0] = self._held[0][:-1].rstrip()
+
+                yield from self._held
+                self._held = []
+
+            if line.endswith("-"):
+                self._held = [line]
+            else:
+                yield line
+
+
 class PlainTextLoader(FileLoader):
     """Load text from a plain text file"""
 
@@ -0,0 +1,54 @@
+def contained(strings: list[str]) -> list[bool]:
+    """Find the strings which are a substring of another, longer string in the list
+
+    The distinct strings are sorted by length (longest first) and joined into one corpus with a separator which
+    doesn't occur in them. A string is contained in a longer one exactly if it occurs in the corpus before its own
+    position, so every string is searched once (in C) in the part of the corpus holding the longer strings.
+
+    This is still O(n * total length) in the worst case, like comparing every pair of strings, but avoids the
+    Python loop over the pairs.
+    """
+
+    distinct = sorted(dict.fromkeys(strings), key=len, reverse=True)
+    separator = next(char for char in map(chr, range(0x110000)) if not any(char in string for string in distinct))
+
+    offsets: dict[str, int] = {}
+    pos = 0
+
+    for string in distinct:
+        offsets[string] = pos
+        pos += len(string) + 1
+
+    corpus = separator.join(distinct)
+
+    # The empty string is found at position 0, which is a longer string unless all strings are empty
+    res = {
+        string: corpus.find(string, 0, offsets[string] + len(string) - 1) != -1 if string else offsets[string] > 0
+        for string in distinct
+    }
+
+    return [res[string] for string in strings]
+
+
+def overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` which is also a prefix of `right` (KMP prefix function)"""
+
+    if not left or not right:
+        return 0
+
+    # Longest border of `right + separator + tail of left`, the separator stops borders from crossing over
+    text = right + "\0" + left[-len(right) :]
+    prefix = [0] * len(text)
+
+    for i in range(1, len(text)):
+        k = prefix[i - 1]
+
+        while k and text[i] != text[k]:
+            k = prefix[k - 1]
+
+        if text[i] == text[k]:
+            k += 1
+
+        prefix[i] = k
+
+    return min(prefix[-1], len(left), len(right))
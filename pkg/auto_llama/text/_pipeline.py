@@ -0,0 +1,242 @@
+import re
+from functools import partial
+from typing import Callable
+
+from ._lemmatizer import lemmatizer
+from ._util import (
+    TOKEN_PATTERN,
+    num_to_char,
+    num_to_char_long,
+    num_to_word,
+    remove_punctuation,
+    remove_specific_pos,
+    remove_word_by_pos,
+    remove_words_by_pos,
+    word_to_lower,
+)
+
+_WORD_CHAR = re.compile(r"\w")
+_WORD = re.compile(r"\w+")
+_REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+
+
+class _TokenStep:
+    """Function applied to single tokens
+
+    If `batch` is given, it is called once with all distinct tokens of a text instead of calling `func` per token.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[str], str],
+        words_only: bool = True,
+        batch: Callable[[list[str]], list[str]] = None,
+    ):
+        self.func = func
+        self.words_only = words_only
+        self.batch = batch
+
+
+class TextPipeline:
+    """Composable text normalization
+
+    Produces the same output as chaining the helper functions (`to_lower`, `merge_spaces`, `merge_symbols`,
+    `delete_symbols`, `remove_punctuation`, `remove_specific_pos`, `lemmatize`, `num_to_word`, `num_to_char`,
+    `num_to_char_long`) in the same order, but scans the text fewer times:
+
+    - Consecutive `merge_spaces`/`merge_symbols` and `delete_symbols` steps with single character symbols are fused
+      into one precompiled regex each (as long as no delete comes before a merge).
+    - Consecutive token level steps share a single tokenization. Results are cached per token within one call.
+    - Numbers are replaced with one precompiled regex, without tokenizing the text.
+
+    Example:
+        pipeline = TextPipeline().merge_spaces().delete_symbols("\\t").lemmatize()
+        text = pipeline(text)
+    """
+
+    def __init__(self) -> None:
+        self._steps: list[tuple[str, object]] = []
+        self._stages: list[Callable[[str], str]] | None = None
+
+    def _add(self, kind: str, value: object) -> "TextPipeline":
+        self._steps.append((kind, value))
+        self._stages = None
+
+        return self
+
+    def to_lower(self) -> "TextPipeline":
+        """Change all text to lower case (except abbreviations and constants)"""
+
+        return self._add("token", _TokenStep(word_to_lower))
+
+    def merge_spaces(self) -> "TextPipeline":
+        """Merge multiple spaces into a single space"""
+
+        return self._add("merge", " ")
+
+    def merge_symbols(self, symbol: str) -> "TextPipeline":
+        """Merge symbols into a single symbol"""
+
+        return self._add("merge", symbol)
+
+    def delete_symbols(self, symbol: str) -> "TextPipeline":
+        """Delete all occurences of the given symbol in the text"""
+
+        return self._add("delete", symbol)
+
+    def remove_punctuation(self) -> "TextPipeline":
+        """Replace all sentence splitting punctuation with ', ' and remove other punctuation"""
+
+        return self._add("text", remove_punctuation)
+
+    def remove_specific_pos(self, contextual: bool = False) -> "TextPipeline":
+        """Remove adverbs and interjections (see `remove_specific_pos` for `contextual`)"""
+
+        if contextual:
+            return self._add("text", partial(remove_specific_pos, contextual=True))
+
+        return self._add("token", _TokenStep(remove_word_by_pos, batch=remove_words_by_pos))
+
+    def lemmatize(self) -> "TextPipeline":
+        """Reduce inflected or derived words to their base or dictionary forms."""
+
+        return self._add("token", _TokenStep(lemmatizer.lemmatize, batch=lemmatizer.batch))
+
+    def num_to_word(self, min_len: int = 1) -> "TextPipeline":
+        """Change numbers to words"""
+
+        return self._add("text", partial(num_to_word, min_len=min_len))
+
+    def num_to_char(self, min_len: int = 1) -> "TextPipeline":
+        """Change digits to chars"""
+
+        return self._add("text", partial(num_to_char, min_len=min_len))
+
+    def num_to_char_long(self, min_len: int = 1) -> "TextPipeline":
+        """Change digits to chars and repeat every char as often as the value of the digit"""
+
+        return self._add("text", partial(num_to_char_long, min_len=min_len))
+
+    def __call__(self, text: str) -> str:
+        """Apply all steps to the text"""
+
+        if self._stages is None:
+            self._stages = self._compile()
+
+        for stage in self._stages:
+            text = stage(text)
+
+        return text
+
+    def _compile(self) -> list[Callable[[str], str]]:
+        stages: list[Callable[[str], str]] = []
+        merges: list[str] = []
+        deletes: list[str] = []
+        tokens: list[_TokenStep] = []
+
+        def flush_symbols():
+            if merges:
+                stages.append(_merge_stage(merges.copy()))
+            if deletes:
+                stages.append(_delete_stage(deletes.copy()))
+
+            merges.clear()
+            deletes.clear()
+
+        def flush_tokens():
+            if tokens:
+                stages.append(_token_stage(tokens.copy()))
+
+            tokens.clear()
+
+        for kind, value in self._steps:
+            if kind != "token":
+                flush_tokens()
+
+            if kind in ("merge", "delete") and _is_literal(value):
+                # Deleting symbols can create new runs of merged symbols, so merges can't be moved before deletes
+                if kind == "merge" and deletes:
+                    flush_symbols()
+
+                (merges if kind == "merge" else deletes).append(value)
+                continue
+
+            flush_symbols()
+
+            if kind == "token":
+                tokens.append(value)
+            elif kind == "merge":
+                stages.append(_regex_stage(value, value))
+            elif kind == "delete":
+                stages.append(_regex_stage(value, ""))
+            else:
+                stages.append(value)
+
+        flush_symbols()
+        flush_tokens()
+
+        return stages
+
+
+def _is_literal(symbol: str) -> bool:
+    return len(symbol) == 1 and symbol not in _REGEX_SPECIAL
+
+
+def _regex_stage(symbol: str, repl: str) -> Callable[[str], str]:
+    pattern = re.compile(f"{symbol}+")
+    return lambda text: pattern.sub(repl, text)
+
+
+def _merge_stage(symbols: list[str]) -> Callable[[str], str]:
+    # Only runs of at least two symbols match, which is faster than a backreference
+    pattern = re.compile("|".join(f"{re.escape(symbol)}{{2,}}" for symbol in dict.fromkeys(symbols)))
+    return lambda text: pattern.sub(lambda match: match.group()[0], text)
+
+
+def _delete_stage(symbols: list[str]) -> Callable[[str], str]:
+    pattern = re.compile("[" + "".join(re.escape(symbol) for symbol in symbols) + "]+")
+    return lambda text: pattern.sub("", text)
+
+
+def _token_stage(steps: list[_TokenStep]) -> Callable[[str], str]:
+    def run(text: str) -> str:
+        tokens = TOKEN_PATTERN.findall(text)
+
+        for step in steps:
+            tokens = _apply(tokens, step)
+
+        return "".join(tokens)
+
+    return run
+
+
+def _apply(tokens: list[str], step: _TokenStep) -> list[str]:
+    """Apply a token step to all (matching) tokens"""
+
+    cache: dict[str, str] = {}
+    res: list[str] = []
+
+    if step.batch:
+        candidates = [
+            token for token in dict.fromkeys(tokens) if token and not (step.words_only and not _WORD_CHAR.match(token))
+        ]
+        cache.update(zip(candidates, step.batch(candidates)))
+
+    for token in tokens:
+        if not token or (step.words_only and not _WORD_CHAR.match(token)):
+            res.append(token)
+            continue
+
+        new = cache.get(token, None)
+
+        if new is None:
+            new = step.func(token)
+            cache[token] = new
+
+        # Split the result if it isn't a single token anymore (e.g. a lemma of multiple words)
+        if new == token or not new or _WORD.fullmatch(new):
+            res.append(new)
+        else:
+            res.extend(TOKEN_PATTERN.findall(new))
+
+    return res
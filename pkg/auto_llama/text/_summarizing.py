@@ -2,28 +2,84 @@ from collections import Counter
 from heapq import nlargest
 from string import punctuation
 
-from auto_llama import ModelLoader, exceptions
+from auto_llama import exceptions
+
+import numpy as np
+
+from ._docs import cache_doc, parse
 
 HAS_DEPENDENCIES = True
 
 try:
+    from spacy.attrs import DEP, ENT_IOB, ENT_TYPE, HEAD, SENT_START
     from spacy.lang.en.stop_words import STOP_WORDS
-    from spacy.language import Language
+    from spacy.tokens import Doc, Span
 except ImportError:
     HAS_DEPENDENCIES = False
 
 
 class Summarizer:
-    """Summarize a given text using NLP"""
+    """Summarize a given text using NLP
+
+    Only sentence boundaries and named entities are needed, so the other components of the spaCy pipeline are
+    disabled. Use `Summarizer.batch` to process many texts at once.
+    """
+
+    DISABLED_COMPONENTS = ("tagger", "attribute_ruler", "lemmatizer")
+    """spaCy components which aren't needed for summarizing"""
+
+    def __init__(self, text: str, sentencizer: bool = False):
+        """
+        Args:
+            text (str): Text which should be summarized
+            sentencizer (bool): Split sentences with rules instead of the dependency parser. Defaults to False.
+        """
 
-    def __init__(self, text: str):
         if not HAS_DEPENDENCIES:
             raise exceptions.ExtrasDependenciesMissing(self.__class__.__name__, "text")
 
         self._text = text
+        self._doc = parse([text], self.DISABLED_COMPONENTS, sentencizer)[0]
+        self._sentencizer: bool | None = sentencizer
+
+    @classmethod
+    def from_doc(cls, doc: "Doc") -> "Summarizer":
+        """Create a summarizer from an already processed spaCy document (needs named entities)"""
+
+        if not HAS_DEPENDENCIES:
+            raise exceptions.ExtrasDependenciesMissing(cls.__name__, "text")
+
+        instance = cls.__new__(cls)
+        instance._text = doc.text
+        instance._doc = doc
+        # Unknown pipeline, so the document of the summary isn't cached
+        instance._sentencizer = None
+
+        return instance
+
+    @classmethod
+    def batch(
+        cls, texts: list[str], n_process: int = 1, batch_size: int = 64, sentencizer: bool = False
+    ) -> list["Summarizer"]:
+        """Create summarizers for multiple texts, processed in batches (and optionally in parallel) by spaCy
+
+        Args:
+            texts (list[str]): Texts which should be summarized
+            n_process (int): Number of processes. Defaults to 1 (-1 uses all cores)
+            batch_size (int): Number of texts per batch. Defaults to 64.
+            sentencizer (bool): Split sentences with rules instead of the dependency parser. Defaults to False.
+        """
+
+        if not HAS_DEPENDENCIES:
+            raise exceptions.ExtrasDependenciesMissing(cls.__name__, "text")
+
+        docs = parse(texts, cls.DISABLED_COMPONENTS, sentencizer, n_process, batch_size)
+        summarizers = [cls.from_doc(doc) for doc in docs]
 
-        nlp = ModelLoader.get("spacy", Language)
-        self._doc = nlp(self._text)
+        for summarizer in summarizers:
+            summarizer._sentencizer = sentencizer
+
+        return summarizers
 
     def word_freq(self) -> Counter:
         """
@@ -45,7 +101,7 @@ class Summarizer:
 
         return cnt
 
-    def _word_freq(self, doc: "Language") -> Counter:
+    def _word_freq(self, doc: "Doc") -> Counter:
         """
         Return a Counter object with the normalized frequency of each word in the text.
 
@@ -72,11 +128,53 @@ class Summarizer:
 
         word_freq = self.word_freq()
         sent_strength = {}
+        sents: dict[str, "Span"] = {}
 
         for sent in self._doc.sents:
             sent_strength[sent.text] = sum([word_freq[word] for word in sent if word.text in word_freq.keys()])
+            sents.setdefault(sent.text, sent)
+
+        selected = nlargest(max_len, sent_strength, key=sent_strength.get)
+        summary = separator.join(selected)
+
+        # Chunking the summary (e.g. when it is saved to a memory) reuses its document instead of parsing it again
+        if self._sentencizer is not None and separator == " " and selected:
+            doc = self._summary_doc([sents[text] for text in selected])
+
+            if doc.text == summary:
+                cache_doc(doc, self.DISABLED_COMPONENTS, self._sentencizer)
+
+        return summary
+
+    def _summary_doc(self, sents: list["Span"]) -> "Doc":
+        """Document of the given sentences joined with spaces, with the annotations of the summarized document"""
+
+        tokens = [token for sent in sents for token in sent]
+        spaces = [bool(token.whitespace_) for token in tokens]
+        ends = np.cumsum([len(sent) for sent in sents]) - 1
+
+        for end in ends:
+            spaces[end] = True
+        spaces[-1] = False
+
+        attrs = [HEAD, DEP] if self._doc.has_annotation("DEP") else [SENT_START]
+        attrs += [ENT_IOB, ENT_TYPE]
+
+        array = np.concatenate([self._doc.to_array(attrs)[sent.start : sent.end] for sent in sents])
+
+        # An entity continued from a sentence which isn't part of the summary starts a new entity
+        iob = attrs.index(ENT_IOB)
+        for start in ends + 1 - [len(sent) for sent in sents]:
+            if array[start, iob] == 1:
+                array[start, iob] = 3
+
+        doc = Doc(self._doc.vocab, words=[token.text for token in tokens], spaces=spaces)
+        doc.from_array(attrs, array)
+
+        if self._doc.tensor.size:
+            doc.tensor = np.concatenate([self._doc.tensor[sent.start : sent.end] for sent in sents])
 
-        return separator.join(nlargest(max_len, sent_strength, key=sent_strength.get))
+        return doc
 
     # TODO: Add sentence shortening/splitting
     # TODO: Add goal specific summarizing (for task, search queries, ...)
@@ -1,4 +1,7 @@
 import re
+import sys
+from functools import lru_cache
+from typing import Callable
 
 from auto_llama import ModelLoader
 from auto_llama.exceptions import ExtrasDependenciesMissing
@@ -6,12 +9,35 @@ from auto_llama.exceptions import ExtrasDependenciesMissing
 # Module specific dependencies
 try:
     from num2words import num2words
-    import nltk
     from nltk.stem import WordNetLemmatizer
+    from nltk.tag import PerceptronTagger
 except ImportError:
     raise ExtrasDependenciesMissing("text", "text")
 
-ModelLoader.add("lemmatizer", lambda: WordNetLemmatizer())
+from ._lemmatizer import lemmatizer
+
+# Called per word, so they are always loaded locally instead of from a model host
+ModelLoader.add("lemmatizer", lambda: WordNetLemmatizer(), remote=False)
+ModelLoader.add("pos_tagger", lambda: PerceptronTagger(), remote=False)
+
+TOKEN_PATTERN = re.compile(r"\b\w+\b|\W+")
+"""Splits a text into words and non-word characters"""
+
+WORD_PATTERN = re.compile(r"^\w+$")
+CONSTANT_PATTERN = re.compile(r"^[A-Z_]+$")
+PUNCTUATION_SEPARATOR_PATTERN = re.compile(r"([!,\-\.:;\?\|\~]) ")
+PUNCTUATION_TABLE = str.maketrans("", "", r"""!"#$%&'()*+-./:;<=>?@[\]^_`{|}~""")
+
+EXCLUDED_POS_TAGS = {"RB", "RBR", "RBS", "UH"}
+"""Adverbs and interjections"""
+
+POS_CACHE_SIZE = 100_000
+"""Maximum number of words with cached part-of-speech tags"""
+
+_pos_cache: dict[str, str] = {}
+
+NUMBER_CACHE_SIZE = 10_000
+"""Maximum number of cached number conversions"""
 
 
 def str_to_list(input: str | list[str]):
@@ -25,7 +51,7 @@ def str_to_list(input: str | list[str]):
 def tokens_from_str(input: str):
     """Take str as input and split it into small parts"""
 
-    return re.findall(r"\b\w+\b|\W+", input)
+    return TOKEN_PATTERN.findall(input)
 
 
 def to_lower(text: str):
@@ -35,13 +61,20 @@ def to_lower(text: str):
     tokens = tokens_from_str(text)
     for i, token in enumerate(tokens):
         # Check if token is a word
-        if re.match(r"^\w+$", token):
-            # Check if token is not an abbreviation or constant
-            if not re.match(r"^[A-Z]+$", token) and not re.match(r"^[A-Z_]+$", token):
-                tokens[i] = token.lower()
+        if WORD_PATTERN.match(token):
+            tokens[i] = word_to_lower(token)
     return "".join(tokens)
 
 
+def word_to_lower(word: str) -> str:
+    """Change a word to lower case, unless it is an abbreviation or constant"""
+
+    if CONSTANT_PATTERN.match(word):
+        return word
+
+    return word.lower()
+
+
 def merge_spaces(text: str):
     """Merge multiple spaces into a single space"""
 
@@ -65,91 +98,165 @@ def remove_punctuation(text: str):
     Replace all sentence splitting punctuation with ', '
     and remove otherpunctuation"""
 
-    punctuation = r"""!"#$%&'()*+-./:;<=>?@[\]^_`{|}~"""
-
-    text = re.sub(r"([!,\-\.:;\?\|\~]) ", ", ", text)
-    return text.translate(str.maketrans("", "", punctuation))
+    text = PUNCTUATION_SEPARATOR_PATTERN.sub(", ", text)
+    return text.translate(PUNCTUATION_TABLE)
 
 
-def remove_specific_pos(text: str):
+def remove_specific_pos(text: str | list[str], contextual: bool = False) -> str | list[str]:
     """
     In the English language, adverbs and interjections rarely provide meaningfull information.
     Removing them improves the embedding precision
+
+    All words of the text (or of a list of texts) are tagged in one batch. By default every word is tagged on its
+    own (cached across calls). With `contextual` the words are tagged as sequence, which is more accurate, but
+    can remove different words and can't be cached.
     """
 
-    # Match both words and non-word characters
-    tokens = tokens_from_str(text)
+    texts = str_to_list(text)
+    docs = [tokens_from_str(t) for t in texts]
+    words = [[token for token in tokens if WORD_PATTERN.match(token)] for tokens in docs]
 
-    # Exclude adverbs and interjections
-    excluded_tags = ["RB", "RBR", "RBS", "UH"]
+    if contextual:
+        tags = [[pos for _, pos in tagged] for tagged in ModelLoader.get("pos_tagger").tag_sents(words)]
+    else:
+        unique = list(dict.fromkeys(word for doc in words for word in doc))
+        known = dict(zip(unique, pos_tag_words(unique)))
+        tags = [[known[word] for word in doc] for doc in words]
 
-    for i, token in enumerate(tokens):
-        # Check if token is a word
-        if re.match(r"^\w+$", token):
-            # Part-of-speech tag the word
-            pos = nltk.pos_tag([token])[0][1]
-            # If the word's POS tag is in the excluded list, remove the word
-            if pos in excluded_tags:
+    res = []
+
+    for tokens, doc_tags in zip(docs, tags):
+        doc_tags = iter(doc_tags)
+
+        # Tags are in the same order as the words among the tokens
+        for i, token in enumerate(tokens):
+            if WORD_PATTERN.match(token) and next(doc_tags) in EXCLUDED_POS_TAGS:
                 tokens[i] = ""
 
-    return "".join(tokens)
+        res.append("".join(tokens))
+
+    return res[0] if isinstance(text, str) else res
+
+
+def pos_tag_words(words: list[str]) -> list[str]:
+    """Part-of-speech tags of words, each tagged on its own (like `nltk.pos_tag([word])`)
+
+    Tags are cached, uncached words are tagged in a single call of the tagger.
+    """
+
+    tags: dict[str, str] = {}
+    missing: list[str] = []
+
+    for word in dict.fromkeys(words):
+        pos = _pos_cache.get(word, None)
+
+        if pos is None:
+            missing.append(word)
+        else:
+            tags[word] = pos
+
+    if missing:
+        tagged = ModelLoader.get("pos_tagger").tag_sents([[word] for word in missing])
+
+        if len(_pos_cache) + len(missing) > POS_CACHE_SIZE:
+            _pos_cache.clear()
+
+        for word, sentence in zip(missing, tagged):
+            tags[word] = _pos_cache[word] = sentence[0][1]
+
+    return [tags[word] for word in words]
+
+
+def remove_words_by_pos(words: list[str]) -> list[str]:
+    """Replace adverbs and interjections (each tagged on its own) with empty strings"""
+
+    return ["" if pos in EXCLUDED_POS_TAGS else word for word, pos in zip(words, pos_tag_words(words))]
+
+
+def remove_word_by_pos(word: str) -> str:
+    """Return an empty string if the word is an adverb or interjection (tagged on its own)"""
+
+    return remove_words_by_pos([word])[0]
 
 
 def lemmatize(text: str):
     """Reduce inflected or derived words to their base or dictionary forms."""
-    return "".join([ModelLoader.get("lemmatizer").lemmatize(word) for word in tokens_from_str(text)])
+    return "".join(lemmatizer.batch(tokens_from_str(text)))
 
 
-def num_to_word(text: str, min_len: int = 1):
+def num_to_word(text: str | list[str], min_len: int = 1) -> str | list[str]:
     """
     Change numbers to words to improve attention on numbers
     """
 
-    # Match both words and non-word characters
-    tokens = tokens_from_str(text)
-    for i, token in enumerate(tokens):
-        # Check if token is a number of length `min_len` or more
-        if token.isdigit() and len(token) >= min_len:
-            # 740700 will become "seven hundred and forty thousand seven hundred".
-            try:
-                tokens[i] = num2words(int(token)).replace(",", "")  # Remove commas from num2words.
-            except ValueError:
-                # catch error for super- or subscript digits
-                pass
+    return _replace_numbers(text, min_len, number_to_word)
 
-    return "".join(tokens)
+
+@lru_cache(maxsize=NUMBER_CACHE_SIZE)
+def number_to_word(number: str) -> str:
+    """Change a number to words (e.g. 740700 will become "seven hundred and forty thousand seven hundred")"""
+
+    try:
+        return num2words(int(number)).replace(",", "")  # Remove commas from num2words.
+    except ValueError:
+        # catch error for super- or subscript digits
+        return number
 
 
-def num_to_char_long(text, min_len: int = 1):
+def num_to_char_long(text: str | list[str], min_len: int = 1) -> str | list[str]:
     """
     Change digits to chars and repeat every char as often as the value of the digit to improve attention on numbers
     """
 
-    def convert_token(token):
-        return "".join((chr(int(digit) + 65) * (i + 1)) for i, digit in enumerate(token[::-1]))[::-1]
+    return _replace_numbers(text, min_len, number_to_char_long)
 
-    # Match both words and non-word characters
-    tokens = tokens_from_str(text)
-    for i, token in enumerate(tokens):
-        # Check if token is a number of length `min_len` or more
-        if token.isdigit() and len(token) >= min_len:
-            # This is done to pay better attention to numbers (e.g. ticket numbers, thread numbers, post numbers)
-            # 740700 will become HHHHHHEEEEEAAAAHHHAAA
-            tokens[i] = convert_token(tokens[i])
-    return "".join(tokens)
 
+@lru_cache(maxsize=NUMBER_CACHE_SIZE)
+def number_to_char_long(number: str) -> str:
+    """Change digits to repeated chars (e.g. 740700 will become HHHHHHEEEEEAAAAHHHAAA)"""
 
-def num_to_char(text, min_len: int = 1):
+    # This is done to pay better attention to numbers (e.g. ticket numbers, thread numbers, post numbers)
+    return "".join((chr(int(digit) + 65) * (i + 1)) for i, digit in enumerate(number[::-1]))[::-1]
+
+
+def num_to_char(text: str | list[str], min_len: int = 1) -> str | list[str]:
     """
     Change digits to char to improve attention on numbers
     """
 
-    # Match both words and non-word characters
-    tokens = tokens_from_str(text)
-    for i, token in enumerate(tokens):
-        # Check if token is a number of length `min_len` or more
-        if token.isdigit() and len(token) >= min_len:
-            # This is done to pay better attention to numbers (e.g. ticket numbers, thread numbers, post numbers)
-            # 740700 will become HEAHAA
-            tokens[i] = "".join(chr(int(digit) + 65) for digit in token)
-    return "".join(tokens)
+    return _replace_numbers(text, min_len, number_to_char)
+
+
+@lru_cache(maxsize=NUMBER_CACHE_SIZE)
+def number_to_char(number: str) -> str:
+    """Change digits to chars (e.g. 740700 will become HEAHAA)"""
+
+    # This is done to pay better attention to numbers (e.g. ticket numbers, thread numbers, post numbers)
+    return "".join(chr(int(digit) + 65) for digit in number)
+
+
+def _replace_numbers(text: str | list[str], min_len: int, func: Callable[[str], str]) -> str | list[str]:
+    """Replace all numbers (words consisting of `min_len` or more digits) in one or multiple texts"""
+
+    pattern = _number_pattern(min_len)
+
+    def repl(match: re.Match) -> str:
+        return func(match.group())
+
+    res = [pattern.sub(repl, t) for t in str_to_list(text)]
+
+    return res[0] if isinstance(text, str) else res
+
+
+@lru_cache
+def _number_pattern(min_len: int) -> re.Pattern:
+    """Regex matching the same numbers as checking `str.isdigit` on every word token"""
+
+    return re.compile(rf"(?<!\w)[{_digits()}]{{{max(min_len, 1)},}}(?!\w)")
+
+
+@lru_cache
+def _digits() -> str:
+    """All characters for which `str.isdigit` is true (unlike `\\d`, this includes super- and subscript digits)"""
+
+    return "".join(re.escape(chr(c)) for c in range(sys.maxunicode + 1) if chr(c).isdigit())
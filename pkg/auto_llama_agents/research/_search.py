@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from itertools import islice
 from typing import Literal
 
@@ -90,6 +91,7 @@ class SearchAgent(Agent):
             raise exceptions.AgentDependenciesMissing(instance.__class__.__name__, "research")
 
         instance.query_generator = "nlp"
+        instance._nlp_pipeline = text.TextPipeline().to_lower().merge_spaces().remove_specific_pos().lemmatize()
         return instance
 
     def _llm_preprocessor(self, request: str):
@@ -105,10 +107,7 @@ class SearchAgent(Agent):
     def _nlp_preprocessor(self, request: str):
         """Generate search query from text input using NLP preprocessing"""
 
-        res = text.to_lower(request)
-        res = text.merge_spaces(res)
-        res = text.remove_specific_pos(res)
-        res = text.lemmatize(res)
+        res = self._nlp_pipeline(request)
 
         logger.print(f"Preprocessed query: {res}", verbose=True)
 
@@ -161,11 +160,19 @@ class WikipediaSearchAgent(SearchAgent):
     def _search(self, query: str) -> AgentResponse:
         articles = wikipedia.search(query)[: self.max_results]
 
-        responses = AgentResponse.empty()
-        for article in articles:
+        def fetch(article: str) -> str | None:
             try:
-                summary = wikipedia.summary(article, auto_suggest=False)
+                return wikipedia.summary(article, auto_suggest=False)
             except wikipedia.PageError:
+                return None
+
+        # Fetch all summaries at once
+        with ThreadPoolExecutor(max(min(len(articles), 8), 1)) as executor:
+            summaries = list(executor.map(fetch, articles))
+
+        responses = AgentResponse.empty()
+        for article, summary in zip(articles, summaries):
+            if summary is None:
                 continue
 
             responses.append(
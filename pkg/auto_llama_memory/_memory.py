@@ -9,7 +9,10 @@ class Memory(ABC):
 
     @abstractmethod
     def save(self, data: Content | list[Content]):
-        """Add new data to the memory"""
+        """Add new data to the memory
+
+        If saving fails, none of the data should be added, so the caller can retry (e.g. one by one).
+        """
 
     @abstractmethod
     def remember(self, query: str, max_tokens: int = 500, max_items: int = 10) -> list[Content]:
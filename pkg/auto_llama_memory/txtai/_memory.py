@@ -1,14 +1,16 @@
 import os
 from datetime import datetime
+from typing import Literal
 
 from auto_llama_memory import ConversationMemory, Memory
 
-from auto_llama import Chat, ChatMessage, exceptions
+from auto_llama import Chat, ChatMessage, ModelLoader, exceptions
 from auto_llama.data import Content
 
 HAS_DEPENDENCIES = True
 
 try:
+    from transformers import AutoTokenizer
     from txtai import Embeddings
     from txtai.embeddings import errors as txtai_errors
 
@@ -26,6 +28,13 @@ except exceptions.ExtrasDependenciesMissing:
 except exceptions.MemoryDependenciesMissing:
     HAS_DEPENDENCIES = False
 
+EMBEDDING_MODEL = "khoa-klaytn/bge-base-en-v1.5-angle"
+"""Embedding model of the txtai memories"""
+
+if HAS_DEPENDENCIES:
+    # Called for every counted text, so it is always loaded locally instead of from a model host
+    ModelLoader.add("txtai_tokenizer", lambda: AutoTokenizer.from_pretrained(EMBEDDING_MODEL), remote=False)
+
 
 class TxtAIMemory(Memory):
     """Long term memory based on embeddings using txtai.
@@ -35,10 +44,23 @@ class TxtAIMemory(Memory):
     # WARNING Untested with new chunking solution (My GPU didn't feel like running anything today xD)
     """
 
-    def __init__(self, path: str = None, data_split: str = "\n") -> None:
+    def __init__(
+        self,
+        path: str = None,
+        data_split: str = "\n",
+        n_process: int = 1,
+        chunking: Literal["sentences", "windows"] = "sentences",
+        window_tokens: int = 256,
+        window_overlap: int = 32,
+    ) -> None:
         """Initialize new memory
 
-        If no path is given, changes will not be saved to disk
+        If no path is given, changes will not be saved to disk. `n_process` is the number of processes used for
+        chunking when saving multiple articles at once (-1 uses all cores).
+
+        With the "sentences" chunking, every sentence and every paragraph is indexed. With "windows", sentences are
+        packed into overlapping windows of `window_tokens` tokens of the embedding model (see
+        `TextChunker.windows`), so nothing is truncated by the encoder and fewer entries are indexed.
         """
 
         if not HAS_DEPENDENCIES:
@@ -47,20 +69,40 @@ class TxtAIMemory(Memory):
         self.permanent = True if path is not None else False
         self.location = path
         self._data_split = data_split
+        self._n_process = n_process
+        self._chunking = chunking
+        self._window_tokens = window_tokens
+        self._window_overlap = window_overlap
 
         if self.permanent:
             os.makedirs(self.location, exist_ok=True)
 
-        self.embeddings = Embeddings(path="khoa-klaytn/bge-base-en-v1.5-angle", content=True)
+        self.embeddings = Embeddings(path=EMBEDDING_MODEL, content=True)
+
+        self._preprocessor = (
+            nlp.TextPipeline()
+            # .to_lower()
+            .merge_spaces()
+            .merge_symbols("\n")
+            .merge_symbols("\r")
+            .delete_symbols("\t")
+            .delete_symbols("\u200b")  # drop zero-width space
+            .delete_symbols("\u00a0")  # drop non-breaking space
+            .delete_symbols("\u00ad")  # drop soft hyphen
+            # .remove_punctuation()
+            .remove_specific_pos()
+            .lemmatize()
+            .num_to_word()
+        )
 
     @classmethod
-    def from_disk(cls, path: str, permanent: bool = True) -> "TxtAIMemory":
+    def from_disk(cls, path: str, permanent: bool = True, **kwargs) -> "TxtAIMemory":
         """Loads a TxtAIMemory from disk
 
         If `permanent` is True, changes in the memory will be saved to the same location. If
-        `permanent` is False, changes  will not be saved
+        `permanent` is False, changes  will not be saved. Other arguments are passed to `TxtAIMemory`.
         """
-        memory = TxtAIMemory(path=path if permanent else None)
+        memory = TxtAIMemory(path=path if permanent else None, **kwargs)
 
         if os.path.exists(os.path.join(path, "config")):
             memory.embeddings.load(path=path)
@@ -87,21 +129,7 @@ class TxtAIMemory(Memory):
         Apply all preprocessing steps to the given text.
         """
 
-        # text = nlp.to_lower(text)
-        text = nlp.merge_spaces(text)
-        text = nlp.merge_symbols(text, symbol="\n")
-        text = nlp.merge_symbols(text, symbol="\r")
-        text = nlp.delete_symbols(text, symbol="\t")
-        text = nlp.delete_symbols(text, symbol="\u200b")  # drop zero-width space
-        text = nlp.delete_symbols(text, symbol="\u00a0")  # drop non-breaking space
-        text = nlp.delete_symbols(text, symbol="\u00ad")  # drop soft hyphen
-
-        # text = nlp.remove_punctuation(text)
-        text = nlp.remove_specific_pos(text)
-        text = nlp.lemmatize(text)
-        text = nlp.num_to_word(text)
-
-        return text
+        return self._preprocessor(text)
 
     def save(self, data: Content | list[Content]):
         if isinstance(data, Content):
@@ -109,23 +137,44 @@ class TxtAIMemory(Memory):
 
         timestamp = datetime.now().isoformat()
 
-        for el in data:
+        # Chunk the original texts in one batch (e.g. a summary was already parsed by the `Summarizer`, see
+        # `doc_cache`) and preprocess the chunks, which are indexed
+        texts = [el.get_content() for el in data]
+        chunkers = TextChunker.batch(texts, n_process=self._n_process if len(data) > 1 else 1)
+
+        # Index all articles at once, so nothing is indexed if one of them fails
+        rows = []
+
+        for el, chunker in zip(data, chunkers):
             metadata = metadata_from_content(el)
 
-            processed = self._preprocess(el.get_content())
-            chunker = TextChunker(processed)
-            segments = chunker.sentences()
-            paragraphs = chunker.paragraphs(0.6)
+            if self._chunking == "windows":
+                # Windows are measured after preprocessing (e.g. written out numbers), like they are indexed
+                windows = chunker.windows(self._window_tokens, self._window_overlap, self._count_processed_tokens)
+                windows = map(self._preprocess, windows)
 
-            self.embeddings.upsert(
-                [{"text": seg, "type": "segment", "timestamp": timestamp, **metadata} for seg in segments]
-            )
-            self.embeddings.upsert(
-                [{"text": p, "type": "paragraph", "timestamp": timestamp, **metadata} for p in paragraphs]
-            )
+                rows.extend({"text": w, "type": "window", "timestamp": timestamp, **metadata} for w in windows)
+                continue
+
+            segments = map(self._preprocess, chunker.sentences())
+            paragraphs = map(self._preprocess, chunker.paragraphs(0.6))
 
+            rows.extend({"text": seg, "type": "segment", "timestamp": timestamp, **metadata} for seg in segments)
+            rows.extend({"text": p, "type": "paragraph", "timestamp": timestamp, **metadata} for p in paragraphs)
+
+        self.embeddings.upsert(rows)
         self.to_disk()
 
+    def _count_tokens(self, text: str) -> int:
+        """Number of tokens of the embedding model in the text (without special tokens)"""
+
+        return len(ModelLoader.get("txtai_tokenizer").encode(text, add_special_tokens=False))
+
+    def _count_processed_tokens(self, text: str) -> int:
+        """Number of tokens of the embedding model in the preprocessed text"""
+
+        return self._count_tokens(self._preprocess(text))
+
     def remember(self, query: str, max_tokens: int = 500, max_items: int = 10) -> list[Content]:
         """Finds matching facts and conversations based on the query"""
 
@@ -133,7 +182,7 @@ class TxtAIMemory(Memory):
 
         try:
             res: list[dict[str, str]] = self.embeddings.search(
-                "select text, src, title FROM txtai where similar(:q)",
+                "select text, src, title, type FROM txtai where similar(:q)",
                 max_items,
                 parameters={"q": processed},
             )
@@ -164,7 +213,17 @@ class TxtAIConversationMemory(ConversationMemory):
         if self.permanent:
             os.makedirs(self.location, exist_ok=True)
 
-        self.embeddings = Embeddings(path="khoa-klaytn/bge-base-en-v1.5-angle", content=True)
+        self.embeddings = Embeddings(path=EMBEDDING_MODEL, content=True)
+
+        self._preprocessor = (
+            nlp.TextPipeline()
+            .to_lower()
+            .merge_spaces()
+            .remove_punctuation()
+            .remove_specific_pos()
+            .lemmatize()
+            .num_to_word()
+        )
 
     @classmethod
     def from_disk(cls, path: str, permanent: bool = True) -> "TxtAIMemory":
@@ -200,14 +259,7 @@ class TxtAIConversationMemory(ConversationMemory):
         Apply all preprocessing steps to the given text.
         """
 
-        text = nlp.to_lower(text)
-        text = nlp.merge_spaces(text)
-        text = nlp.remove_punctuation(text)
-        text = nlp.remove_specific_pos(text)
-        text = nlp.lemmatize(text)
-        text = nlp.num_to_word(text)
-
-        return text
+        return self._preprocessor(text)
 
     def save(self, chat: Chat):
         """Saves each 'user' and 'assistant' message to conversation memory
@@ -89,7 +89,9 @@ def db_fragments_to_content(fragments: list[dict[str, Any]], split: str, max_tok
     contents = []
     for el in items:
         merger = ChunkMerger([f["text"] for f in el])
-        text = merger.merge(split)
+
+        # Consecutive windows share their trailing sentences, which shouldn't be repeated in the merged text
+        text = merger.merge(split, stitch=any(f.get("type") == "window" for f in el))
         text = trim(text, max_tokens)
 
         contents.append(Article(text=text, title=el[0]["title"], src=el[0]["src"]))
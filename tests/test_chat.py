@@ -0,0 +1,128 @@
+import pytest
+
+from auto_llama import Chat
+
+SYSTEM_MESSAGE = "You are a helpful assistant.\n{context}"
+
+TURNS = [
+    ("What is the capital of France?", "Paris.", "France is a country in Europe. Its capital is Paris."),
+    ("How many people live there?", "About two million.", "Paris has a population of about 2.1 million."),
+    ("And in the whole country?", "About 68 million.", "France has a population of about 68 million."),
+]
+
+
+def _render_turns(layout: str) -> list[tuple[str, str]]:
+    """Prompt and context of every turn, with a new chat per request like the chat completion route"""
+
+    messages: list[tuple[str, str]] = []
+    prompts = []
+
+    for question, answer, context in TURNS:
+        messages.append(("user", question))
+
+        chat = Chat(SYSTEM_MESSAGE)
+        for role, message in messages:
+            chat.append(role, message)
+
+        if layout == "prefix_cache":
+            chat.format_system_message()
+            chat.attach_context(context)
+        else:
+            chat.format_system_message(context=context)
+
+        prompts.append((chat.prompt, context))
+        messages.append(("assistant", answer))
+
+    return prompts
+
+
+def _prefix_reused(prompt: str, context: str, next_prompt: str) -> bool:
+    """Check if the prompt without the per-turn context is the beginning of the prompt of the next turn"""
+
+    return next_prompt.startswith(prompt.replace(context, "").rstrip("\n"))
+
+
+def test_prefix_cache_layout_keeps_prefix_stable():
+    prompts = _render_turns("prefix_cache")
+
+    for (prompt, context), (next_prompt, _) in zip(prompts, prompts[1:]):
+        assert context not in next_prompt
+        assert _prefix_reused(prompt, context, next_prompt)
+
+
+def test_system_layout_changes_prefix():
+    prompts = _render_turns("system")
+
+    for (prompt, context), (next_prompt, _) in zip(prompts, prompts[1:]):
+        assert not _prefix_reused(prompt, context, next_prompt)
+
+
+def test_attach_context_keeps_rendered_prefix():
+    chat = Chat(SYSTEM_MESSAGE)
+    chat.format_system_message()
+    prefixes = []
+
+    for question, answer, context in TURNS:
+        chat.append("user", question)
+        prefixes.append(chat.prompt)
+
+        chat.attach_context(context)
+        assert chat.prompt.startswith(prefixes[-1])
+
+        chat.append("assistant", answer)
+
+    for prefix in prefixes:
+        assert chat.prompt.startswith(prefix)
+
+
+class _RecordingMemory:
+    """Conversation memory which records the saved chats"""
+
+    def __init__(self) -> None:
+        self.saved: list[Chat] = []
+
+    def save(self, chat: Chat):
+        self.saved.append(chat)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_fit_does_not_resummarize_summaries(columnar: bool):
+    chat = Chat("You are a helpful assistant.", token_counter=lambda text: 10, columnar=columnar)
+    memory = _RecordingMemory()
+    summarized: list[list[str]] = []
+
+    def summarizer(messages) -> str:
+        summarized.append([chat_msg.message for chat_msg in messages])
+        return f"summary {len(summarized)}"
+
+    for i in range(6):
+        chat.append("user", f"message {i}")
+
+    chat.fit(40, memory, summarizer, summary_tokens=10)
+
+    assert chat.is_summary(chat.history[1])
+    assert not chat.is_summary(chat.history[0])
+
+    for i in range(6, 10):
+        chat.append("user", f"message {i}")
+
+    deleted = chat.fit(40, memory, summarizer, summary_tokens=10)
+
+    assert all(messages and "summary" not in " ".join(messages) for messages in summarized)
+    assert all(chat_msg.role != "system" for chat_msg in deleted)
+
+    # The evicted summary isn't taken as system message of the saved chats
+    assert all(not saved._has_system_message for saved in memory.saved)
+    assert chat.history[0].message == "You are a helpful assistant."
+    assert chat.history[1].message == "summary 2"
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_evicted_messages_are_a_list(columnar: bool):
+    chat = Chat(token_counter=lambda text: 10, columnar=columnar)
+
+    for i in range(6):
+        chat.append("user", f"message {i}")
+
+    assert isinstance(chat.trunc(4), list)
+    assert isinstance(chat.fit(20), list)
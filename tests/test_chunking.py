@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+pytest.importorskip("spacy")
+
+from auto_llama.text import ChunkMerger  # noqa: E402
+from auto_llama.text._matching import contained  # noqa: E402
+
+
+def test_contained_matches_pairwise_search():
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        strings = ["".join(rng.choices("ab", k=rng.randint(0, 6))) for _ in range(rng.randint(1, 6))]
+        expected = [any(s in other and len(other) > len(s) for other in strings) for s in strings]
+
+        assert contained(strings) == expected
+
+
+def test_merge_skips_contained_chunks():
+    chunks = ["The cat sat on the mat.", "cat sat", "Dogs run fast.", "Dogs run fast."]
+
+    assert ChunkMerger(chunks).merge() == "The cat sat on the mat. Dogs run fast."
+
+
+def test_merge_stitches_overlapping_windows():
+    windows = ["First sentence here. Second sentence here.", "Second sentence here. Third sentence here."]
+
+    assert ChunkMerger(windows).merge(stitch=True) == "First sentence here. Second sentence here. Third sentence here."
+    assert ChunkMerger(windows).merge() == " ".join(windows)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from auto_llama.text import _docs  # noqa: E402
+
+
+@pytest.fixture
+def nlp():
+    nlp = spacy.blank("en")
+    rng = np.random.default_rng(0)
+
+    for word in "the cat sat on mat dogs run fast in park".split():
+        nlp.vocab.set_vector(word, rng.normal(size=16).astype("float32"))
+
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+
+def test_hosted_doc_keeps_word_vectors(nlp, monkeypatch):
+    doc = nlp("the cat sat on the mat. dogs run fast in the park.")
+
+    # Documents from a model host are rebuilt with a blank vocab without vectors
+    monkeypatch.setattr(_docs, "_vocab", lambda: spacy.blank("en").vocab)
+    hosted = _docs._doc_from_bytes(_docs._doc_to_bytes(doc))
+
+    assert hosted.vocab.vectors.size == 0
+    assert [sent.text for sent in hosted.sents] == [sent.text for sent in doc.sents]
+
+    for sent, hosted_sent in zip(doc.sents, hosted.sents):
+        assert np.allclose(sent.vector, hosted_sent.vector)
+
+
+def test_chunking_a_summary_reuses_its_document(nlp, monkeypatch):
+    from auto_llama import ModelLoader
+    from auto_llama.text import Summarizer, TextChunker
+
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "GPE", "pattern": "Berlin"}, {"label": "GPE", "pattern": "Paris"}])
+
+    monkeypatch.setitem(ModelLoader._models, "spacy", nlp)
+    _docs.doc_cache.configure(max_docs=8)
+
+    try:
+        summary = Summarizer("The cat sat in Berlin.\nDogs run fast in Paris. Nothing here.").summarize(2)
+        chunker = TextChunker(summary)
+        hits = _docs.doc_cache.stats()["hits"]
+    finally:
+        _docs.doc_cache.configure(max_docs=0)
+
+    assert hits == 1
+    assert chunker.sentences() == [sent.text for sent in nlp(summary).sents]
+
+    for sent, parsed in zip(chunker._doc.sents, nlp(summary).sents):
+        assert np.allclose(sent.vector, parsed.vector)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from auto_llama.text import WebTextLoader
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Serves `/page/<n>` slowly (counting concurrent requests), `/flaky` with a 503 on the first request and 404
+    for everything else"""
+
+    protocol_version = "HTTP/1.1"
+
+    active = 0
+    peak = 0
+    flaky_requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+
+        if self.path.startswith("/page/"):
+            with cls.lock:
+                cls.active += 1
+                cls.peak = max(cls.peak, cls.active)
+
+            # Keep the request open while the other requests arrive
+            time.sleep(0.1)
+
+            with cls.lock:
+                cls.active -= 1
+
+            self._send(200, f"<html><title>Page {self.path[6:]}</title><body>Text</body></html>")
+        elif self.path == "/flaky":
+            with cls.lock:
+                cls.flaky_requests += 1
+                first = cls.flaky_requests == 1
+
+            if first:
+                self._send(503, "Unavailable")
+            else:
+                self._send(200, "<html><title>Flaky</title></html>")
+        else:
+            self._send(404, "Not found")
+
+    def _send(self, status: int, body: str):
+        data = body.encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _PageHandler.active = _PageHandler.peak = _PageHandler.flaky_requests = 0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield f"http://127.0.0.1:{server.server_port}"
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_batch_limits_requests_per_host(server):
+    loader = WebTextLoader(max_workers=16, max_per_host=4)
+    articles = loader.batch([f"{server}/page/{i}" for i in range(16)])
+
+    assert [article.title for article in articles] == [f"Page {i}" for i in range(16)]
+    assert _PageHandler.peak == 4
+
+
+def test_abatch_limits_requests_per_host(server):
+    loader = WebTextLoader(max_workers=16, max_per_host=4)
+    articles = asyncio.run(loader.abatch([f"{server}/page/{i}" for i in range(16)]))
+
+    assert [article.title for article in articles] == [f"Page {i}" for i in range(16)]
+    assert _PageHandler.peak == 4
+
+
+def test_unavailable_page_is_retried(server):
+    article = WebTextLoader()(f"{server}/flaky")
+
+    assert article.title == "Flaky"
+    assert _PageHandler.flaky_requests == 2
+
+
+def test_missing_page_raises(server):
+    loader = WebTextLoader()
+
+    with pytest.raises(requests.HTTPError):
+        loader(f"{server}/missing")
+
+    articles = loader.batch([f"{server}/page/0", f"{server}/missing"], return_exceptions=True)
+
+    assert articles[0].title == "Page 0"
+    assert isinstance(articles[1], requests.HTTPError)
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from auto_llama import ModelLoader
+
+
+class _CountingLoader:
+    """Slow loader which counts how often it was called"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> object:
+        with self._lock:
+            self.calls += 1
+
+        # Keep the loader running while the other callers arrive
+        time.sleep(0.2)
+
+        return object()
+
+
+@pytest.fixture
+def model():
+    name = "test_single_flight"
+    loader = _CountingLoader()
+    ModelLoader.add(name, loader, size=0)
+
+    yield name, loader
+
+    ModelLoader.drop(name)
+
+
+def test_concurrent_get_loads_once(model):
+    name, loader = model
+    barrier = threading.Barrier(32)
+
+    def get():
+        barrier.wait()
+        return ModelLoader.get(name)
+
+    with ThreadPoolExecutor(32) as executor:
+        models = list(executor.map(lambda _: get(), range(32)))
+
+    assert loader.calls == 1
+    assert all(m is models[0] for m in models)
+
+
+def test_concurrent_aget_loads_once(model):
+    name, loader = model
+
+    async def main():
+        return await asyncio.gather(*(ModelLoader.aget(name) for _ in range(32)))
+
+    models = asyncio.run(main())
+
+    assert loader.calls == 1
+    assert all(m is models[0] for m in models)
+
+
+def test_mixed_get_and_aget_load_once(model):
+    name, loader = model
+
+    async def main():
+        threads = [asyncio.to_thread(ModelLoader.get, name) for _ in range(16)]
+        return await asyncio.gather(*threads, *(ModelLoader.aget(name) for _ in range(16)))
+
+    models = asyncio.run(main())
+
+    assert loader.calls == 1
+    assert all(m is models[0] for m in models)
+
+
+def test_drop_unloaded_model_does_not_block_other_models(model):
+    name, loader = model
+    ModelLoader.add("test_drop_other", lambda: "other", size=0)
+    ModelLoader.get("test_drop_other")
+
+    dropping = threading.Thread(target=ModelLoader.drop, args=(name,))
+    dropping.start()
+    time.sleep(0.05)
+
+    # The drop runs the slow loader, cache hits of other models must not wait for it
+    start = time.perf_counter()
+    assert ModelLoader.get("test_drop_other") == "other"
+    assert time.perf_counter() - start < 0.1
+
+    dropping.join()
+    ModelLoader.drop("test_drop_other")
+    ModelLoader.add(name, loader, size=0)